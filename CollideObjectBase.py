@@ -1,5 +1,6 @@
 from panda3d.core import PandaNode, Loader, NodePath, CollisionNode, CollisionSphere, CollisionInvSphere, CollisionCapsule, Vec3
 # CollisionNode is generic collider, Shapes for objects, and Vec3 for placing
+import Lifecycle as lifecycle
 
 class PlacedObject(PandaNode):
     '''Generic object in the scene.'''
@@ -12,6 +13,13 @@ class PlacedObject(PandaNode):
         
         self.modelNode.reparentTo(parentNode)
         self.modelNode.setName(nodeName)
+        self.modelNode.setTag('modelPath', modelPath) # Lets snapshot clients load the same model
+        lifecycle.Register(self) # Hand to lifecycle.Release() when removed from the game
+
+    def SetTexture(self, loader: Loader, texPath: str):
+        '''Apply texPath and tag it, so snapshot clients can texture the same model.'''
+        self.modelNode.setTexture(loader.loadTexture(texPath), 1)
+        self.modelNode.setTag('texPath', texPath)
 
 class CollidableObject(PlacedObject):
     '''All objects that can collide inherit from this class.'''
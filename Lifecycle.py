@@ -0,0 +1,139 @@
+from panda3d.core import NodePath, WeakNodePath, CollisionTraverser
+import gc, weakref
+
+# Every PlacedObject registers here on creation and must be handed to Release() when it leaves the game.
+# Only weak references are kept, so the registry itself never keeps an entity, node or interval alive.
+# The exception is Hold(): resident entities nothing else owns (planets, the station, wanderers) stay alive until released.
+
+PRUNE_EVERY = 256 # Releases between dropping records of entities that are fully gone
+
+class _Record:
+    def __init__(self, entity):
+        self.typeName = type(entity).__name__
+        self.entity = weakref.ref(entity)
+        self.modelNode = WeakNodePath(entity.modelNode)
+        self.collisionNode = None # Filled in on release, colliders attach after PlacedObject.__init__
+        self.traversers = [] # Traversers the collider was added to, kept after release for LeakCheck()
+        self.released = False
+
+_records = {} # lifecycle id -> _Record
+_intervals = [] # (weakref to interval, lifecycle id of owner or None)
+_held = {} # lifecycle id -> resident entity, strong until Release()
+_nextID = 1
+_releaseCount = 0
+
+live = {} # type name -> entities currently registered and not released
+peak = {} # type name -> highest live count seen
+created = {} # type name -> total registered
+released = {} # type name -> total released
+
+
+def Register(entity):
+    '''Start tracking a newly created PlacedObject.'''
+    global _nextID
+    entity.lifecycleID = _nextID
+    _nextID += 1
+    record = _Record(entity)
+    _records[entity.lifecycleID] = record
+    entity.modelNode.setPythonTag('entity', weakref.ref(entity)) # Weak, a strong tag would be an uncollectable cycle
+
+    typeName = record.typeName
+    created[typeName] = created.get(typeName, 0) + 1
+    live[typeName] = live.get(typeName, 0) + 1
+    peak[typeName] = max(peak.get(typeName, 0), live[typeName])
+
+def EntityOf(nodePath: NodePath):
+    '''The registered entity owning a model node, or None if it is gone.'''
+    entityRef = nodePath.getPythonTag('entity')
+    return entityRef() if entityRef else None
+
+def Hold(entity):
+    '''Keep a registered entity alive until Release(), for entities with no other owner.'''
+    _held[entity.lifecycleID] = entity
+
+def TrackCollider(entity, traverser: CollisionTraverser):
+    '''Remember that entity's collider was added to traverser, so Release() can take it out.'''
+    _records[entity.lifecycleID].traversers.append(traverser)
+
+def TrackInterval(interval, owner = None):
+    '''Finished intervals still alive after their owner is released are reported as leaks.'''
+    _intervals.append((weakref.ref(interval), owner.lifecycleID if owner is not None else None))
+
+def Release(entity):
+    '''Detach the entity from the scene graph and its traversers. Releasing twice is harmless.'''
+    global _releaseCount
+    record = _records.get(getattr(entity, 'lifecycleID', None))
+    if record is None or record.released:
+        return
+    record.released = True
+
+    collisionNode = getattr(entity, 'collisionNode', None)
+    if collisionNode is not None:
+        record.collisionNode = WeakNodePath(collisionNode)
+        for traverser in record.traversers:
+            traverser.removeCollider(collisionNode)
+    entity.modelNode.detachNode()
+    _held.pop(entity.lifecycleID, None)
+
+    live[record.typeName] -= 1
+    released[record.typeName] = released.get(record.typeName, 0) + 1
+
+    _releaseCount += 1
+    if _releaseCount % PRUNE_EVERY == 0:
+        _Prune()
+
+def _NodeGone(weakNode: WeakNodePath) -> bool:
+    return weakNode is None or weakNode.wasDeleted()
+
+def _Prune():
+    '''Forget released entities whose wrapper and nodes are all freed, and dead intervals.'''
+    for lifecycleID in [i for i, record in _records.items() if record.released and record.entity() is None
+                        and _NodeGone(record.modelNode) and _NodeGone(record.collisionNode)]:
+        del _records[lifecycleID]
+    _intervals[:] = [(intervalRef, owner) for intervalRef, owner in _intervals if intervalRef() is not None]
+
+def LeakCheck() -> dict:
+    '''Collects garbage, then lists what released entities left behind, per entity type.
+       Keys: wrappers (Python object still referenced), nodes (model node still in memory),
+       attached (model node back under a parent), colliders (still in a traverser) and intervals.'''
+    gc.collect()
+    _Prune()
+
+    leaks = {'wrappers': {}, 'nodes': {}, 'attached': {}, 'colliders': {}, 'intervals': {}}
+    def Count(kind, typeName):
+        leaks[kind][typeName] = leaks[kind].get(typeName, 0) + 1
+
+    for record in _records.values():
+        if not record.released:
+            continue
+        entity = record.entity()
+        if entity is not None:
+            Count('wrappers', record.typeName)
+        if not _NodeGone(record.collisionNode):
+            collisionNode = record.collisionNode.getNodePath()
+            if any(traverser.hasCollider(collisionNode) for traverser in record.traversers):
+                Count('colliders', record.typeName)
+        if not _NodeGone(record.modelNode):
+            Count('nodes', record.typeName)
+            if record.modelNode.getNodePath().hasParent():
+                Count('attached', record.typeName)
+
+    for intervalRef, owner in _intervals:
+        interval = intervalRef()
+        ownerRecord = _records.get(owner)
+        ownerGone = owner is None or ownerRecord is None or ownerRecord.released
+        if interval is not None and not interval.isPlaying() and ownerGone:
+            Count('intervals', type(interval).__name__)
+    return leaks
+
+def Report() -> str:
+    '''Live/peak counts per entity type plus LeakCheck(), one line per type, for soak test logs.'''
+    leaks = LeakCheck()
+    lines = []
+    for typeName in sorted(created):
+        lines.append(f"{typeName}: live {live[typeName]}, peak {peak[typeName]}, created {created[typeName]}, released {released.get(typeName, 0)}, "
+                     f"leaked wrappers {leaks['wrappers'].get(typeName, 0)}, nodes {leaks['nodes'].get(typeName, 0)}, "
+                     f"attached {leaks['attached'].get(typeName, 0)}, colliders {leaks['colliders'].get(typeName, 0)}")
+    for intervalType, count in sorted(leaks['intervals'].items()):
+        lines.append(f"{intervalType}: {count} finished intervals still referenced")
+    return '\n'.join(lines)
@@ -1,15 +1,37 @@
 from CollideObjectBase import SphereCollideObject
-from panda3d.core import Loader, NodePath, Vec3, TransparencyAttrib, CollisionHandlerEvent
+from panda3d.core import Loader, NodePath, Vec3, TransparencyAttrib, CollisionHandlerQueue
 from direct.interval.LerpInterval import LerpFunc
 from direct.particles.ParticleEffect import ParticleEffect
 from direct.task.Task import TaskManager
 from typing import Callable
 from direct.task import Task
 from SpaceJamClasses import Missile
+import Lifecycle as lifecycle
 from direct.gui.OnscreenImage import OnscreenImage
 import re # For string editing
 import random
 
+def FirstImpacts(entries: list, liveMissiles) -> list:
+    '''Keeps the earliest contact per (missile, target), then walks them in time of impact order.
+       Each missile in liveMissiles stops at its first impact. Returns (missile tag, victim name, entry) per missile.'''
+    contacts = {}
+    for entry in entries:
+        key = (entry.getFromNodePath().getName(), entry.getIntoNodePath().getName())
+        if key not in contacts or entry.getT() < contacts[key].getT():
+            contacts[key] = entry
+
+    impacts = []
+    spentMissiles = set()
+    for (fromNode, intoNode), entry in sorted(contacts.items(), key = lambda contact: contact[1].getT()):
+        shooter = fromNode.split('_')[0]
+        if shooter in spentMissiles:
+            continue # Already stopped by an earlier impact
+        if shooter not in liveMissiles:
+            continue # Missile was cleaned up before its contact was resolved
+        spentMissiles.add(shooter)
+        impacts.append((shooter, intoNode.split('_')[0], entry))
+    return impacts
+
 class Spaceship(SphereCollideObject): # Player
     def __init__(self, base, loader: Loader, taskMgr: TaskManager, accept: Callable[[str, Callable], None], modelPath: str, parentNode: NodePath, nodeName: str, texPath: str, posVec: Vec3, scaleVec: float):
         super(Spaceship, self).__init__(loader, modelPath, parentNode, nodeName, Vec3(0, 0, 0), 10)
@@ -18,15 +40,15 @@ class Spaceship(SphereCollideObject): # Player
         self.modelNode.setPos(posVec)
         self.modelNode.setScale(scaleVec)
         self.modelNode.setName(nodeName) 
-        tex = loader.loadTexture(texPath)
-        self.modelNode.setTexture(tex, 1)
+        self.SetTexture(loader, texPath)
         self.base = base # Pass base when instanced from Showbase
         self.cntExplode = 0
         self.explodeIntervals = {}
 
         self._SetCollisions()
         self.SetKeyBindings()
-        self.EnableHUD()
+        if not self.base.headless: # No aspect2d to draw on in server mode
+            self.EnableHUD()
         self._SetMissiles()
         self.SetParticles()
 
@@ -59,11 +81,10 @@ class Spaceship(SphereCollideObject): # Player
         self.Hud.setTransparency(TransparencyAttrib.MAlpha)
     
     def _SetCollisions(self):
-        '''Handles collision setting and debugging.'''
+        '''Missile contacts are queued during traversal and resolved by ResolveCollisions().'''
         self.traverser = self.base.cTrav
-        self.handler = CollisionHandlerEvent()
-        self.handler.addInPattern('into')
-        self.accept('into', self.HandleInto)
+        self.handler = CollisionHandlerQueue()
+        self.taskMgr.add(self.ResolveCollisions, 'resolveCollisions', sort = 31) # Right after traversal at sort 30
 
     # Missiles
     def _SetMissiles(self):
@@ -91,11 +112,13 @@ class Spaceship(SphereCollideObject): # Player
             currentMissile = Missile(self.base.loader, './Assets/Phaser/phaser.egg', self.base.render, tag, posVec, 2.0) # Instantiate
 
             # Duration (2.0), Path to take (travVec), Starting position (posVec), Check collisions between frames (Fluid)
-            Missile.Intervals[tag] = currentMissile.modelNode.posInterval(2.0, travVec, startPos = posVec, fluid = 1) # fluid = 1 checks in-between intervals
+            currentMissile.interval = currentMissile.modelNode.posInterval(2.0, travVec, startPos = posVec, fluid = 1) # fluid = 1 checks in-between intervals
+            lifecycle.TrackInterval(currentMissile.interval, currentMissile)
             
-            Missile.Intervals[tag].start()
+            currentMissile.interval.start()
 
             self.traverser.addCollider(currentMissile.collisionNode, self.handler)
+            lifecycle.TrackCollider(currentMissile, self.traverser)
         
         else:
             if not self.taskMgr.hasTaskNamed('reload'):
@@ -124,10 +147,12 @@ class Spaceship(SphereCollideObject): # Player
 
                 # Duration (2.0), Path to take (travVec), Starting position (posVec), Check collisions between frames (Fluid)
                 endPos = posVec + travVec
-                Missile.Intervals[tag] = currentMissile.modelNode.posInterval(2.0, endPos, startPos = posVec, fluid = 1) # fluid = 1 checks in-between intervals
+                currentMissile.interval = currentMissile.modelNode.posInterval(2.0, endPos, startPos = posVec, fluid = 1) # fluid = 1 checks in-between intervals
+                lifecycle.TrackInterval(currentMissile.interval, currentMissile)
                 
-                Missile.Intervals[tag].start()
+                currentMissile.interval.start()
                 self.traverser.addCollider(currentMissile.collisionNode, self.handler)
+                lifecycle.TrackCollider(currentMissile, self.traverser)
             
         else:
             if not self.taskMgr.hasTaskNamed('reload'):
@@ -149,115 +174,109 @@ class Spaceship(SphereCollideObject): # Player
             return Task.cont
 
     def CheckIntervals(self, task):
-        '''Handles missile node detachment and deletion.'''
-        for i in Missile.Intervals:
-            if not Missile.Intervals[i].isPlaying():
-                Missile.cNodes[i].detachNode()
-                Missile.fireModels[i].detachNode()
-
-                del Missile.Intervals[i]
-                del Missile.fireModels[i]
-                del Missile.cNodes[i]
-                del Missile.collisionSolids[i]
-                break # Memory still used when dictionary objects are deleted, so we break to refactor.
+        '''Releases every missile whose flight has finished, collider and nodes included.'''
+        for tag in [tag for tag, missile in Missile.missiles.items() if not missile.interval.isPlaying()]:
+            lifecycle.Release(Missile.missiles.pop(tag))
 
         return Task.cont
     
-    def HandleInto(self, entry):
-        '''Handles debugging for collisions, and parses for missile collision detection with drones.'''
-
-        fromNode = entry.getFromNodePath().getName()
-        intoNode = entry.getIntoNodePath().getName()
+    def ResolveCollisions(self, task):
+        '''Drains the queue once per frame after traversal and resolves every missile hit in one batch.'''
+        numEntries = self.handler.getNumEntries()
+        if not numEntries:
+            return Task.cont
 
-        intoPosition = Vec3(entry.getSurfacePoint(self.base.render))
+        entries = [self.handler.getEntry(i) for i in range(numEntries)]
+        self.handler.clearEntries() # Traversal may be skipped next frame, don't resolve these twice
+
+        destroyed = set()
+        for shooter, victim, entry in FirstImpacts(entries, Missile.missiles):
+            Missile.missiles[shooter].interval.finish()
+            if victim in destroyed:
+                continue
+            destroyed.add(victim)
+
+            victimNode = entry.getIntoNodePath().getParent() # Model node owning the collider
+            kind = self._VictimKind(victim)
+            if kind == 'Drone':
+                self.DroneDestroy(victimNode, Vec3(entry.getSurfacePoint(self.base.render)))
+            elif kind == "Planet":
+                self.PlanetDestroy(victimNode)
+            elif kind == "Space Station":
+                self.SpaceStationDestroy(victimNode)
 
-        tempVar = fromNode.split('_')
-        shooter = tempVar[0]
-        tempVar = intoNode.split('-')
-        tempVar = intoNode.split('_')
-        victim = tempVar[0]
+        return Task.cont
 
+    def _VictimKind(self, victim: str) -> str:
+        '''Strips numbers and the pattern identifier, e.g. "Drone12-Cloud" -> "Drone".'''
         pattern = r'[0-9]' # Remove numbers 0 - 9
         strippedString = re.sub(pattern, '', victim) # Arguments are characters we don't want, what we want to replace, string to edit.
-        strippedString = strippedString.split('-')[0] # Remove pattern identifier
-
-        if (strippedString == 'Drone'):
-            Missile.Intervals[shooter].finish()
-            self.DroneDestroy(victim, intoPosition)
-        
-        elif strippedString == "Planet":
-            Missile.Intervals[shooter].finish()
-            self.PlanetDestroy(victim)
-
-        elif strippedString == "Space Station":
-            Missile.Intervals[shooter].finish()
-            self.SpaceStationDestroy(victim)
-
+        return strippedString.split('-')[0] # Remove pattern identifier
+
+    def DroneDestroy(self, nodeID: NodePath, hitPosition):
+        '''Detach the hit drone, then cause a particle explosions at it's position.
+           Streamed drones are only detached, their formation pools or releases them.'''
+        drone = lifecycle.EntityOf(nodeID)
+        if hasattr(drone, 'Despawn'): # Orbiters and wanderers also stop their task or route
+            drone.Despawn()
         else:
-            try:
-                Missile.Intervals[shooter].finish()
-            except KeyError: # This is required to keep the program from crashing, but doesn't fix the problem.
-                pass
-    
-    def DroneDestroy(self, hitID, hitPosition):
-        '''Find a drone with hitID, detach its node, then cause a particle explosions at it's position.'''
-
-        nodeID = self.base.render.find(hitID)
-        try:
             nodeID.detachNode()
-        except AssertionError: # This is required to keep the program from crashing, but doesn't fix the problem.
-            pass
         self.explodeNode.setPos(hitPosition)
         self.Explode(hitPosition)
     
-    def PlanetDestroy(self, victim: NodePath):
-        nodeID = self.base.render.find(victim)
-
+    def PlanetDestroy(self, nodeID: NodePath):
         self.taskMgr.add(self.PlanetShrink, name = "PlanetShrink", extraArgs = [nodeID], appendTask = True)
     
-    def SpaceStationDestroy(self, victim: NodePath):
-        nodeID = self.base.render.find(victim)
-
+    def SpaceStationDestroy(self, nodeID: NodePath):
         self.taskMgr.add(self.SpaceStationShrink, name = "SpaceStationShrink", extraArgs = [nodeID], appendTask = True)
     
     def PlanetShrink(self, nodeID: NodePath, task):
-        if task.time < 2.0:
-            if nodeID.getBounds().getRadius() > 0:
-                if nodeID.getScale() < 0:
-                    nodeID.detachNode()
-                    return task.done
-                scaleSubtraction = 5
-                nodeID.setScale(nodeID.getScale() - scaleSubtraction)
-                
-                temp = 30 * random.random()
-                nodeID.setH(nodeID.getH() + temp)
-                return task.cont
+        scaleSubtraction = 5
+        if task.time < 2.0 and nodeID.getSx() > scaleSubtraction:
+            nodeID.setScale(nodeID.getScale() - scaleSubtraction)
+            
+            temp = 30 * random.random()
+            nodeID.setH(nodeID.getH() + temp)
+            return task.cont
+
+        self._ReleaseNode(nodeID) # Shrunk away or out of time, either way it's gone
+        return task.done
     
     def SpaceStationShrink(self, nodeID: NodePath, task):
-        if task.time < 2.0:
-            if nodeID.getBounds().getRadius() > 0:
-                if nodeID.getScale() < 0:
-                    nodeID.detachNode()
-                    return task.done
-                scaleSubtraction = 0.01
-                nodeID.setScale(nodeID.getScale() - scaleSubtraction)
-                
-                temp = 30 * random.random()
-                nodeID.setH(nodeID.getH() + temp)
-                return task.cont
+        scaleSubtraction = 0.01
+        if task.time < 2.0 and nodeID.getSx() > scaleSubtraction:
+            nodeID.setScale(nodeID.getScale() - scaleSubtraction)
+            
+            temp = 30 * random.random()
+            nodeID.setH(nodeID.getH() + temp)
+            return task.cont
+
+        self._ReleaseNode(nodeID)
+        return task.done
+
+    def _ReleaseNode(self, nodeID: NodePath):
+        '''Release the entity owning nodeID, or just detach it if it has none.'''
+        entity = lifecycle.EntityOf(nodeID)
+        if entity is not None:
+            lifecycle.Release(entity)
+        else:
+            nodeID.detachNode()
     
     def Explode(self, impactPoint):
         '''Handles particle generation and LerpFunc execution.'''
         self.cntExplode += 1
         tag = 'particles-' + str(self.cntExplode)
 
-        self.explodeIntervals[tag] = LerpFunc(self.ExplodeLight, fromData = 0, toData = 1, duration = 2.0, extraArgs = [impactPoint])
+        self.explodeIntervals[tag] = LerpFunc(self.ExplodeLight, fromData = 0, toData = 1, duration = 2.0, extraArgs = [impactPoint, tag])
+        lifecycle.TrackInterval(self.explodeIntervals[tag])
         self.explodeIntervals[tag].start()
     
-    def ExplodeLight(self, t, explosionPosition):
+    def ExplodeLight(self, t, explosionPosition, tag):
         '''Helper function for controlling particle explosion activation parameters.'''
-        if t == 1.0 and self.explodeEffect:
-            self.explodeEffect.disable()
+        if t == 1.0:
+            self.explodeIntervals.pop(tag, None) # Done, don't keep finished intervals around
+            if self.explodeEffect:
+                self.explodeEffect.disable()
         
         elif t == 0:
             self.explodeEffect.start(self.explodeNode)
@@ -270,6 +289,15 @@ class Spaceship(SphereCollideObject): # Player
         self.explodeEffect.setScale(20)
         self.explodeNode = self.base.render.attachNewNode('ExplosionEffects')
 
+        # Full-quality particle counts, scaled down by SetParticleBudget()
+        self.particleSizes = [(particles, particles.getPoolSize(), particles.getLitterSize()) for particles in self.explodeEffect.getParticlesList()]
+
+    def SetParticleBudget(self, budget: float):
+        '''Scale explosion particle pool and litter sizes, 1.0 is full quality.'''
+        for particles, poolSize, litterSize in self.particleSizes:
+            particles.setPoolSize(max(1, int(poolSize * budget)))
+            particles.setLitterSize(max(1, int(litterSize * budget)))
+
     # Movement
     def fwdThrust(self, keyDown):
         if keyDown:
@@ -0,0 +1,107 @@
+from direct.showbase.ShowBase import ShowBase
+from panda3d.core import ClockObject, PandaNode
+from SpaceJamClasses import Orbiter
+import collections, os, time
+
+# Cheapest settings last. droneDrawDistance hides (but keeps collidable) drones further than it from the hero.
+QUALITY_LEVELS = [
+    {'droneDrawDistance': None, 'particleBudget': 1.0, 'orbiterInterval': 1, 'traverseInterval': 1},
+    {'droneDrawDistance': 8000, 'particleBudget': 0.6, 'orbiterInterval': 2, 'traverseInterval': 1},
+    {'droneDrawDistance': 5000, 'particleBudget': 0.35, 'orbiterInterval': 3, 'traverseInterval': 2},
+    {'droneDrawDistance': 3000, 'particleBudget': 0.15, 'orbiterInterval': 4, 'traverseInterval': 2},
+]
+
+class QualityGovernor:
+    '''Steps QUALITY_LEVELS up or down to keep the rolling average frame time inside the target budget.'''
+    def __init__(self, base: ShowBase, targetFPS: float = 60, windowSize: int = 120, logPath: str = None):
+        self.base = base
+        self.clock = ClockObject.getGlobalClock()
+        self.budget = 1.0 / targetFPS
+        self.frameTimes = collections.deque(maxlen = windowSize)
+        self.cooldown = windowSize # Frames to wait after a change so the window only sees the new level
+        self.level = 0
+        self.dronesHidden = False
+
+        # Hysteresis band, degrade past 115% of the budget and only recover under 75%.
+        self.degradeThreshold = self.budget * 1.15
+        self.recoverThreshold = self.budget * 0.75
+
+        self.logFile = None # Level changes are only logged to CSV when a logPath is given
+        if logPath:
+            newLog = not os.path.exists(logPath) or os.path.getsize(logPath) == 0
+            self.logFile = open(logPath, 'a')
+            if newLog:
+                self.logFile.write('time,frame,fromLevel,toLevel,avgFrameMs,maxFrameMs\n')
+
+        # Collision traversal of base.cTrav is driven from here so its rate can be throttled. ShowBase's collisionLoop
+        # would traverse every frame, and its resetPrevTransform would drop the fluid sweep of skipped frames.
+        # Fluid moves are only swept when the traverser respects prev transforms, otherwise each is a static test.
+        self.base.cTrav.setRespectPrevTransform(True)
+        self.base.taskMgr.remove('collisionLoop')
+        self.base.taskMgr.remove('resetPrevTransform')
+        self.traverseInterval = 1
+
+        self.base.taskMgr.add(self.Watch, 'qualityGovernor')
+        self.base.taskMgr.add(self.Traverse, 'governedTraverse', sort = 30) # Same slot as ShowBase's collisionLoop
+        self.base.taskMgr.doMethodLater(0.5, self.CullDrones, 'droneDetail')
+
+    def Watch(self, task):
+        '''Record the last frame time, then step the level when the window is clearly off budget.'''
+        self.frameTimes.append(self.clock.getDt())
+        if self.cooldown:
+            self.cooldown -= 1
+            return task.cont
+        if len(self.frameTimes) < self.frameTimes.maxlen:
+            return task.cont
+
+        average = sum(self.frameTimes) / len(self.frameTimes)
+        if average > self.degradeThreshold and self.level < len(QUALITY_LEVELS) - 1:
+            self.SetLevel(self.level + 1, average)
+        elif average < self.recoverThreshold and self.level > 0:
+            self.SetLevel(self.level - 1, average)
+        return task.cont
+
+    def SetLevel(self, level: int, average: float = 0.0):
+        '''Apply every setting of the given level and log the change.'''
+        settings = QUALITY_LEVELS[level]
+        if self.logFile:
+            self.logFile.write(f"{time.time():.3f},{self.clock.getFrameCount()},{self.level},{level},{average * 1000:.2f},{max(self.frameTimes, default = 0) * 1000:.2f}\n")
+            self.logFile.flush()
+        print(f"Quality level {self.level} -> {level} ({average * 1000:.1f} ms average frame)")
+
+        self.level = level
+        self.base.Hero.SetParticleBudget(settings['particleBudget'])
+        Orbiter.updateInterval = settings['orbiterInterval']
+        self.traverseInterval = settings['traverseInterval']
+        self.CullDrones()
+
+        self.frameTimes.clear()
+        self.cooldown = self.frameTimes.maxlen
+
+    def Traverse(self, task):
+        '''Collision traversal, skipped on some frames at low quality. Previous transforms are only reset after
+           a traversal, so fluid moves are swept from where they were at the last one, skipped frames included.'''
+        if self.clock.getFrameCount() % self.traverseInterval == 0:
+            self.base.cTrav.traverse(self.base.render)
+            PandaNode.resetAllPrevTransform()
+        return task.cont
+
+    def CullDrones(self, task = None):
+        '''Hide drones beyond the draw distance. Hidden drones are still collidable.'''
+        drawDistance = QUALITY_LEVELS[self.level]['droneDrawDistance']
+        if drawDistance is not None or self.dronesHidden: # Nothing to do at full detail once everything is shown
+            heroPos = self.base.Hero.modelNode.getPos()
+            for drone in self.base.render.findAllMatches('Drone*'):
+                if drawDistance is None or (drone.getPos() - heroPos).length() < drawDistance:
+                    drone.show()
+                else:
+                    drone.hide()
+            self.dronesHidden = drawDistance is not None
+        if task:
+            return task.again
+
+    def Close(self):
+        '''Close the CSV log, if one was opened.'''
+        if self.logFile:
+            self.logFile.close()
+            self.logFile = None
@@ -3,48 +3,71 @@
 # WASD: Camera control, look up/left/down/right
 # SPACE: Move forwards
 # Q & E: Move left and right respectively
+# Run with --server for a headless authoritative server, or --client to render a running server's snapshots.
+# Formations stream in around the hero, which the server only moves on a client's input. --all-sectors keeps the
+# whole world loaded instead, --cycles N (drones per formation) implies it so the bandwidth report covers every drone.
+# --fps N sets the quality governor's target and --quality-log PATH appends its level changes to a CSV file,
+# --scenario PATH loads another world description, --leak-report SECONDS logs entity counts and leaks for soak tests.
 
 
 from direct.showbase.ShowBase import ShowBase
-from panda3d.core import CollisionTraverser, CollisionHandlerPusher
+from panda3d.core import CollisionTraverser, CollisionHandlerPusher, loadPrcFileData
 import math, sys, random
 
-import DefensePaths as defensePaths
 import SpaceJamClasses as spaceJamClasses
 import Player as player
+import SpaceJamNet as spaceJamNet
+import QualityGovernor as qualityGovernor
+import WorldStreamer as worldStreamer
+import Lifecycle as lifecycle
 
 
 class MyApp(ShowBase):
 
-    def __init__(self):
+    def __init__(self, headless: bool = False, droneCycles: int = None, targetFPS: float = 60, scenarioPath: str = "./Assets/Scenarios/SolarSystem.json", leakReportInterval: float = 0,
+                 streamAll: bool = False, qualityLogPath: str = None):
 
         ShowBase.__init__(self)
+        self.headless = headless # Simulation only, snapshots are published to clients instead
+        self.droneCycles = droneCycles # None keeps the scenario's formationCycles
+        self.scenarioPath = scenarioPath
+        self.streamAll = streamAll # Load every sector, not just those around the hero
 
         # Create world
         self.SetCollisions()
         self.SetupScene()
-        self.SetCamera()
-        self.SetMusic()
+        if not self.headless:
+            self.SetCamera()
+            self.SetMusic()
         self.SetPlayerCollisions()
+        self.governor = qualityGovernor.QualityGovernor(self, targetFPS, logPath = qualityLogPath)
+
+        if self.headless:
+            self.server = spaceJamNet.SnapshotServer(self)
+        if leakReportInterval:
+            self.taskMgr.doMethodLater(leakReportInterval, self.LeakReport, 'leakReport')
 
         # Start setting key bindings.    
         self.accept('escape', self.quit)
 
     def SetupScene(self):
-        '''Spawns planets, the universe, space station, the player, and drones.'''
-        self._generate_planets()
-        self._generate_drones()
-        
+        '''Spawns the resident scene from the scenario, formations and orbiters are streamed by sector.'''
+        self.scenario = worldStreamer.LoadScenario(self.scenarioPath)
+        planets = self._generate_planets()
 
-        self.Universe = spaceJamClasses.Universe(self.loader, "./Assets/Universe/Universe.x", self.render, 'Universe', "Assets/Universe/Universe.jpg", (0, 0, 0), 13500)
-        self.SpaceStation1 = spaceJamClasses.SpaceStation(self.loader, "./Assets/Space Station/spacestation.obj", self.render, 'Space Station', "./Assets/Space Station/Metal.jpg", (-7500, 500, 100), 0.3)
-        self.Hero = player.Spaceship(self, self.loader, self.taskMgr, self.accept, "./Assets/Spaceships/spaceship.obj", self.render, 'Hero', "./Assets/Spaceships/spaceship.jpg", (1000, 1200, -50), 0.5)
-        self._generate_orbiters()
+        universe, station, hero = self.scenario['universe'], self.scenario['station'], self.scenario['hero']
+        self.Universe = spaceJamClasses.Universe(self.loader, universe['model'], self.render, universe['name'], universe['texture'], tuple(universe['position']), universe['scale'])
+        lifecycle.Hold(spaceJamClasses.SpaceStation(self.loader, station['model'], self.render, station['name'], station['texture'], tuple(station['position']), station['scale']))
+        self.Hero = player.Spaceship(self, self.loader, self.taskMgr, self.accept, hero['model'], self.render, hero['name'], hero['texture'], tuple(hero['position']), hero['scale'])
+        self._generate_wanderers()
+
+        self.streamer = worldStreamer.WorldStreamer(self, self.scenario, self._randomize_planets(planets), self.droneCycles, self.streamAll)
 
     def SetCollisions(self):
         '''Handles traversing and pushing collisions'''
  
         self.cTrav = CollisionTraverser()
+        self.cTrav.setRespectPrevTransform(True) # Sweep fluid moves, so missile contacts carry a time of impact
         self.cTrav.traverse(self.render)
         self.pusher = CollisionHandlerPusher()
 
@@ -55,106 +78,42 @@ class MyApp(ShowBase):
         self.cTrav.addCollider(self.Hero.collisionNode, self.pusher)
 
     def _generate_planets(self):
-        '''Spawns planets at random positions with a minimum distance between each.'''
-
-        # Path dictionary
-        planets = [
-            {"texture_path": "./Assets/Planets/Mars.jpg"},
-            {"texture_path": "./Assets/Planets/Purple.png"},
-            {"texture_path": "./Assets/Planets/Sand.png"},
-            {"texture_path": "./Assets/Planets/Tiled.jpg"},
-            {"texture_path": "./Assets/Planets/Wicker.jpg"},
-            {"texture_path": "./Assets/Planets/Rock.jpg"}
-        ]
+        '''Spawns planets at random positions with a minimum distance between each, returns them.'''
+        planets = self.scenario['planets']
 
         # Spawn planets at "random" positions within the player's view
-        self.minDistance = 1000 # Drones rarely collide between planets
+        self.minDistance = planets['minDistance'] # Drones rarely collide between planets
         self.existing_positions = []
+        generated = []
 
-        for i, planet_spec in enumerate(planets):
-            position = self._generate_position(self.existing_positions, self.minDistance)
-            planet = spaceJamClasses.Planet(self.loader, "./Assets/Planets/protoPlanet.x", self.render, f"Planet{i+1}", planet_spec["texture_path"], position, random.randint(150, 275))
-            setattr(self, f"Planet{i+1}", planet)
+        for i, texture_path in enumerate(planets['textures']):
+            position = self._generate_position(self.existing_positions, self.minDistance, planets['region'])
+            planet = spaceJamClasses.Planet(self.loader, planets['model'], self.render, f"Planet{i+1}", texture_path, position, random.randint(*planets['scale']))
+            lifecycle.Hold(planet) # Only the lifecycle owns planets, so shooting one frees it
+            generated.append(planet)
             self.existing_positions.append(position)
+        return generated
 
     def _distance(self, pos1, pos2):
         '''Distance formula'''
         return math.sqrt((pos1[0] - pos2[0])**2 + (pos1[1] - pos2[1])**2 + (pos1[2] - pos2[2])**2)
     
-    def _generate_position(self, existing_positions, min_distance):
+    def _generate_position(self, existing_positions, min_distance, region):
         '''Generate position, check if it's closer than the minimum distance, then return the position.'''
         while True:
-            new_position = (random.randint(-2000, 10000), random.randint(2000, 7000), random.randint(-350, 3550))
+            new_position = tuple(random.randint(low, high) for low, high in region)
             if all(self._distance(new_position, pos) >= min_distance for pos in existing_positions):
                 return new_position
 
-    def _generate_drones(self):
-        '''Spawn Drone patterns around random planets. '''
-        solar_system = [self.Planet1, self.Planet2, self.Planet3, self.Planet4, self.Planet5, self.Planet6]
-        self._randomize_planets(solar_system)
-
-        fullCycle = 60
-        for j in range(fullCycle):
-            spaceJamClasses.Drone.droneCount += 1
-            nickName = "Drone" + str(spaceJamClasses.Drone.droneCount)
-
-            # Changed name of each drone so find() method could differentiate.
-            self.DrawCloudDefense(self.CloudPlanet, nickName + '-Cloud')
-            self.DrawBaseballSeams(self.MLBPlanet, nickName + '-Baseball', j, fullCycle, 2)
-            self.DrawCircleX(self.XYZPlanet, nickName + '-X', j)
-            self.DrawCircleY(self.XYZPlanet, nickName + '-Y', j)
-            self.DrawCircleZ(self.XYZPlanet, nickName + '-Z', j)
-    
-    def _generate_orbiters(self):
-        '''Spawns all orbiter drones, and the wanderer drones.'''
-        self.rootAssetFolder = "Assets"
-        self.Sentinal1 = spaceJamClasses.Orbiter(self.loader, self.taskMgr, self.rootAssetFolder + "/DroneDefender/DroneDefender.obj", self.render, "Drone-MLBOrb1", 
-                                                 6.0, self.rootAssetFolder + "/DroneDefender/octotoad1_auv.png", self.OrbPlanet, random.randint(800, 900), "MLB", self.Hero)
-        self.Sentinal2 = spaceJamClasses.Orbiter(self.loader, self.taskMgr, self.rootAssetFolder + "/DroneDefender/DroneDefender.obj", self.render, "Drone-CloudOrb1", 
-                                                 6.0, self.rootAssetFolder + "/DroneDefender/octotoad1_auv.png", self.OrbPlanet, random.randint(400, 500), "Cloud", self.Hero)
-        self.Sentinal3 = spaceJamClasses.Orbiter(self.loader, self.taskMgr, self.rootAssetFolder + "/DroneDefender/DroneDefender.obj", self.render, "Drone-MLBOrb2", 
-                                                 6.0, self.rootAssetFolder + "/DroneDefender/octotoad1_auv.png", self.OrbPlanet, random.randint(700, 800), "MLB", self.Hero)
-        self.Sentinal4 = spaceJamClasses.Orbiter(self.loader, self.taskMgr, self.rootAssetFolder + "/DroneDefender/DroneDefender.obj", self.render, "Drone-CloudOrb2", 
-                                                 6.0, self.rootAssetFolder + "/DroneDefender/octotoad1_auv.png", self.OrbPlanet, random.randint(500, 600), "Cloud", self.Hero)
-        self.Wanderer1 = spaceJamClasses.Wanderer(self.loader, self.rootAssetFolder + "/DroneDefender/DroneDefender.obj", self.render, "Drone-W1", 6.0, self.rootAssetFolder + "/DroneDefender/octotoad1_auv.png", self.Hero)
-        self.Wanderer2 = spaceJamClasses.Wanderer(self.loader, self.rootAssetFolder + "/DroneDefender/DroneDefender.obj", self.render, "Drone-W2", 6.0, self.rootAssetFolder + "/DroneDefender/octotoad1_auv.png", self.Hero)
-    
+    def _generate_wanderers(self):
+        '''Spawns the wanderer drones, their routes cross every sector so they stay resident.'''
+        orbiter = self.scenario['orbiter']
+        for name in self.scenario['wanderers']:
+            lifecycle.Hold(spaceJamClasses.Wanderer(self.loader, orbiter['model'], self.render, name, orbiter['scale'], orbiter['texture'], self.Hero))
+
     def _randomize_planets(self, planets):
-        '''Planet RNG helper function.'''
-        self.CloudPlanet = planets.pop(random.randrange(len(planets)))
-        self.MLBPlanet = planets.pop(random.randrange(len(planets)))
-        self.XYZPlanet = planets.pop(random.randrange(len(planets)))
-        self.OrbPlanet = planets.pop(random.randrange(len(planets)))
-
-    def DrawBaseballSeams(self, centralObject, droneName, step, numSeams, radius = 1):
-        unitVec = defensePaths.BaseballSeams(step, numSeams, B = 0.4)
-        unitVec.normalize()
-        position = unitVec * radius * 250 + centralObject.modelNode.getPos()
-        spaceJamClasses.Drone(self.loader, "./Assets/DroneDefender/DroneDefender.obj", self.render, droneName, "./Assets/DroneDefender/octotoad1_auv.png", position, 5)
-
-    def DrawCloudDefense(self, centralObject, droneName):
-        unitVec = defensePaths.Cloud()
-        unitVec.normalize()
-        position = unitVec * 500 + centralObject.modelNode.getPos()
-        spaceJamClasses.Drone(self.loader, "./Assets/DroneDefender/DroneDefender.obj", self.render, droneName, "./Assets/DroneDefender/octotoad1_auv.png", position, 5)
-    
-    def DrawCircleX(self, centralObject, droneName, step, radius=1):
-        unitVec = defensePaths.CircleX(step)
-        unitVec.normalize()
-        position = unitVec * radius * 500 + centralObject.modelNode.getPos()
-        spaceJamClasses.Drone(self.loader, "./Assets/DroneDefender/DroneDefender.obj", self.render, droneName, "./Assets/DroneDefender/octotoad1_auv.png", position, 5)
-
-    def DrawCircleY(self, centralObject, droneName, step, radius=1):
-        unitVec = defensePaths.CircleY(step) 
-        unitVec.normalize()
-        position = unitVec * radius * 500 + centralObject.modelNode.getPos()
-        spaceJamClasses.Drone(self.loader, "./Assets/DroneDefender/DroneDefender.obj", self.render, droneName, "./Assets/DroneDefender/octotoad1_auv.png", position, 5)
-
-    def DrawCircleZ(self, centralObject, droneName, step, radius=1):
-        unitVec = defensePaths.CircleZ(step) 
-        unitVec.normalize()
-        position = unitVec * radius * 500 + centralObject.modelNode.getPos()
-        spaceJamClasses.Drone(self.loader, "./Assets/DroneDefender/DroneDefender.obj", self.render, droneName, "./Assets/DroneDefender/octotoad1_auv.png", position, 5)
+        '''Planet RNG helper function, gives each scenario role its own random planet.'''
+        return {role: planets.pop(random.randrange(len(planets))) for role in self.scenario['planets']['roles']}
 
     def SetCamera(self):
         self.disableMouse()
@@ -167,10 +126,38 @@ class MyApp(ShowBase):
         self.BGMusic.play() 
 
         
+    def LeakReport(self, task):
+        '''Periodic lifecycle report, compare runs over time to spot growth.'''
+        print(lifecycle.Report())
+        return task.again
+
     # Prepare message if server wants to quit.
     def quit(self):
         '''Exit game.'''
+        print(lifecycle.Report())
+        self.governor.Close()
         sys.exit()
         
-app = MyApp()
+def _ArgValue(flag: str, default, cast = int):
+    '''Value following flag on the command line, or default.'''
+    if flag in sys.argv[:-1]:
+        return cast(sys.argv[sys.argv.index(flag) + 1])
+    return default
+
+scenarioPath = _ArgValue('--scenario', "./Assets/Scenarios/SolarSystem.json", str)
+leakReportInterval = _ArgValue('--leak-report', 0, float)
+qualityLogPath = _ArgValue('--quality-log', None, str)
+
+if '--client' in sys.argv:
+    app = spaceJamNet.ViewerApp()
+elif '--server' in sys.argv:
+    # Movement and timers are per frame, so the server runs at the frame rate a windowed game would
+    targetFPS = _ArgValue('--fps', 60)
+    loadPrcFileData('', f'window-type none\naudio-library-name null\nclock-mode limited\nclock-frame-rate {targetFPS}')
+    droneCycles = _ArgValue('--cycles', None)
+    app = MyApp(headless = True, droneCycles = droneCycles, targetFPS = targetFPS, scenarioPath = scenarioPath, leakReportInterval = leakReportInterval,
+                streamAll = droneCycles is not None or '--all-sectors' in sys.argv, qualityLogPath = qualityLogPath)
+else:
+    app = MyApp(targetFPS = _ArgValue('--fps', 60), scenarioPath = scenarioPath, leakReportInterval = leakReportInterval, streamAll = '--all-sectors' in sys.argv,
+                qualityLogPath = qualityLogPath)
 app.run()
\ No newline at end of file
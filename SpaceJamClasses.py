@@ -3,6 +3,7 @@ from CollideObjectBase import *
 from direct.task.Task import TaskManager
 from direct.interval.IntervalGlobal import Sequence
 import DefensePaths as defensePaths
+import Lifecycle as lifecycle
 import random
 
 class Planet(SphereCollideObject):
@@ -11,8 +12,7 @@ class Planet(SphereCollideObject):
         self.modelNode.setPos(posVec)
         self.modelNode.setScale(scaleVec)
         self.modelNode.setName(nodeName) 
-        tex = loader.loadTexture(texPath)
-        self.modelNode.setTexture(tex, 1)
+        self.SetTexture(loader, texPath)
 
 class Drone(SphereCollideObject):
     def __init__(self, loader: Loader, modelPath: str, parentNode: NodePath, nodeName: str, texPath: str, posVec: Vec3, scaleVec: float):
@@ -20,8 +20,15 @@ class Drone(SphereCollideObject):
         self.modelNode.setPos(posVec)
         self.modelNode.setScale(scaleVec)
         self.modelNode.setName(nodeName) 
-        tex = loader.loadTexture(texPath)
-        self.modelNode.setTexture(tex, 1)
+        self.SetTexture(loader, texPath)
+
+    def Reuse(self, parentNode: NodePath, nodeName: str, posVec: Vec3):
+        '''Bring a pooled drone back under a new name, collider included.'''
+        self.modelNode.reparentTo(parentNode)
+        self.modelNode.setName(nodeName)
+        self.collisionNode.setName(nodeName + '_cNode')
+        self.modelNode.setPos(posVec)
+        self.modelNode.show()
 
     # How many drones have been spawned.
     droneCount = 0
@@ -32,8 +39,7 @@ class Universe(InverseSphereCollideObject):
         self.modelNode.setPos(posVec)
         self.modelNode.setScale(scaleVec)
         self.modelNode.setName(nodeName) 
-        tex = loader.loadTexture(texPath)
-        self.modelNode.setTexture(tex, 1)
+        self.SetTexture(loader, texPath)
 
 class SpaceStation(CapsuleCollidableObject):
     def __init__(self, loader: Loader, modelPath: str, parentNode: NodePath, nodeName: str, texPath: str, posVec: Vec3, scaleVec: float):
@@ -41,40 +47,34 @@ class SpaceStation(CapsuleCollidableObject):
         self.modelNode.setPos(posVec)
         self.modelNode.setScale(scaleVec)
         self.modelNode.setName(nodeName) 
-        tex = loader.loadTexture(texPath)
-        self.modelNode.setTexture(tex, 1)
+        self.SetTexture(loader, texPath)
 
 class Missile(SphereCollideObject):
-    fireModels = {}
-    cNodes = {}
-    collisionSolids = {}
-    Intervals = {}
+    missiles = {} # Tag -> Missile in flight, removed by Spaceship.CheckIntervals
     missileCount = 0
 
     def __init__(self, loader: Loader, modelPath: str, parentNode: NodePath, nodeName: str, texPath: str, posVec: Vec3, scaleVec: float = 1.0):
         super(Missile, self).__init__(loader, modelPath, parentNode, nodeName, Vec3(0, 0, 0), 1.0)
         self.modelNode.setScale(scaleVec)
         self.modelNode.setPos(posVec)
+        self.interval = None # Flight path, set by whoever fires it
         Missile.missileCount += 1
-        Missile.fireModels[nodeName] = self.modelNode
-        Missile.cNodes[nodeName] = self.collisionNode
-
-        Missile.collisionSolids[nodeName] = self.collisionNode.node().getSolid(0) # Retrieve solid for collisionNode
+        Missile.missiles[nodeName] = self
         print('Fire torpedo #' + str(Missile.missileCount))
 
 class Orbiter(SphereCollideObject):
     numOrbits = 0 # Unique names for tasks
     velocity = random.uniform(0.005, 0.02) # Speed of drone
     cloudTimer = 240 # How long for drone to move
+    updateInterval = 1 # Frames between orbit updates, raised by the quality governor
 
-    def __init__(self, loader: Loader, taskMgr: TaskManager, modelPath: str, parentNode: NodePath, nodeName: str, scaleVec: Vec3, texPath: str, centralObject: PlacedObject, orbitRadius: float, orbitType: str, staringAt: Vec3):
+    def __init__(self, loader: Loader, taskMgr: TaskManager, modelPath: str, parentNode: NodePath, nodeName: str, scaleVec: Vec3, texPath: str, orbitCenter: Vec3, orbitRadius: float, orbitType: str, staringAt: Vec3):
         super(Orbiter, self,).__init__(loader, modelPath, parentNode, nodeName, Vec3(0, 0, 0), 3.2)
         self.taskMgr = taskMgr
         self.orbitType = orbitType
         self.modelNode.setScale(scaleVec)
-        tex = loader.loadTexture(texPath)
-        self.modelNode.setTexture(tex, 1)
-        self.orbitObject = centralObject
+        self.SetTexture(loader, texPath)
+        self.orbitCenter = orbitCenter # A position, holding the planet would keep it alive after it's shot
         self.orbitRadius = orbitRadius
         self.staringAt = staringAt
         Orbiter.numOrbits += 1 # Unique names
@@ -84,9 +84,12 @@ class Orbiter(SphereCollideObject):
         taskMgr.add(self.Orbit, self.taskFlag)
     
     def Orbit(self, task):
+        if ClockObject.getGlobalClock().getFrameCount() % Orbiter.updateInterval:
+            return task.cont
+
         if self.orbitType == "MLB":
             positionVec = defensePaths.BaseballSeams(task.time * Orbiter.velocity, self.numOrbits, 2.0)
-            self.modelNode.setPos(positionVec * self.orbitRadius + self.orbitObject.modelNode.getPos())
+            self.modelNode.setPos(positionVec * self.orbitRadius + self.orbitCenter)
         
         elif self.orbitType == "Cloud":
             if self.cloudClock < Orbiter.cloudTimer:
@@ -95,11 +98,16 @@ class Orbiter(SphereCollideObject):
             else:
                 self.cloudClock = 0
                 positionVec = defensePaths.Cloud()
-                self.modelNode.setPos(positionVec * self.orbitRadius + self.orbitObject.modelNode.getPos())
+                self.modelNode.setPos(positionVec * self.orbitRadius + self.orbitCenter)
         
         self.modelNode.lookAt(self.staringAt.modelNode)
         return task.cont
 
+    def Despawn(self):
+        '''Stop orbiting and leave the scene graph, its OrbiterSlot releases it when the sector unloads.'''
+        self.taskMgr.remove(self.taskFlag)
+        self.modelNode.detachNode()
+
 
 class Wanderer(SphereCollideObject):
     numWanderers = 0
@@ -108,8 +116,7 @@ class Wanderer(SphereCollideObject):
         super(Wanderer, self).__init__(loader, modelPath, parentNode, modelName, Vec3(0, 0, 0), 3.2)
 
         self.modelNode.setScale(scaleVec)
-        tex = loader.loadTexture(texPath)
-        self.modelNode.setTexture(tex, 1)
+        self.SetTexture(loader, texPath)
         self.staringAt = staringAt
         Wanderer.numWanderers += 1
 
@@ -124,6 +131,12 @@ class Wanderer(SphereCollideObject):
 
         sequence_name = f"Traveler{Wanderer.numWanderers}"
         self.travelRoute = Sequence(posInterval0, posInterval1, posInterval2, name=sequence_name)
+        lifecycle.TrackInterval(self.travelRoute, self)
         self.travelRoute.loop()
 
+    def Despawn(self):
+        '''Shot down, stop the route and leave the game for good.'''
+        self.travelRoute.pause()
+        lifecycle.Release(self)
+
 
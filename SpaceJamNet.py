@@ -0,0 +1,428 @@
+from direct.showbase.ShowBase import ShowBase
+from panda3d.core import NodePath, Vec3
+import socket, struct, sys, time
+
+# Snapshot protocol, all integers in network byte order:
+#   client -> server: HELLO/ACK datagram (tag, last fully applied tick)
+#   client -> server: INPUT datagram (tag, bitmask of HELD_INPUTS then FIRE_INPUTS)
+#   client -> server: BYE datagram (tag, 0) when the viewer exits
+#   server -> client: header, then spawn, update and remove records
+# Updates are deltas against the last tick the client acked, so a client that
+# has seen a drone never receives its name, model or texture path again.
+# Only the earliest connected client controls the Hero, other viewers just watch.
+# Clients silent for CLIENT_TIMEOUT seconds are dropped, a crashed viewer never says BYE.
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 47470
+
+POS_STEPS = 16 # 1/16 of a world unit
+ANGLE_STEPS = 65536 / 360.0 # Full circle fits in a signed short
+SCALE_STEPS = 1024
+
+FIELD_COUNT = 7 # x, y, z, h, p, r, uniform scale
+HISTORY_LENGTH = 64 # Ticks kept as possible delta baselines
+MAX_DATAGRAM = 8192 # Larger snapshots are split into fragments
+CLIENT_TIMEOUT = 5.0 # Seconds without a datagram before a client is dropped
+
+# Controls the viewer forwards to the server's Hero: (viewer key, Spaceship method)
+HELD_INPUTS = [('space', 'fwdThrust'), ('a', 'LeftTurn'), ('d', 'RightTurn'), ('w', 'UpTurn'),
+               ('s', 'DownTurn'), ('q', 'leftThrust'), ('e', 'rightThrust')] # Called with keyDown on every change
+FIRE_INPUTS = [('f', 'Fire'), ('shift-f', 'FireBarrage')] # Called once when their bit goes up
+
+_ACK = struct.Struct('!cI') # Also carries HELLO, INPUT masks and BYE
+_HEADER = struct.Struct('!cIIHHHHH') # tag, tick, baseline, fragment index/count, spawn/update/remove counts
+_ENTITY = struct.Struct('!IB') # entity id, name length or field mask
+_REMOVE = struct.Struct('!I')
+_FIELDS = [struct.Struct('!i')] * 3 + [struct.Struct('!h')] * 3 + [struct.Struct('!i')]
+
+
+def _QuantizeAngle(angle: float) -> int:
+    '''Wrap degrees into a signed 16 bit angle.'''
+    steps = int(round(angle * ANGLE_STEPS)) % 65536
+    return steps - 65536 if steps >= 32768 else steps
+
+def QuantizeTransform(pos: Vec3, hpr: Vec3, scale: float) -> tuple:
+    '''Pack a transform into the integer fields sent over the wire.'''
+    return (int(round(pos[0] * POS_STEPS)), int(round(pos[1] * POS_STEPS)), int(round(pos[2] * POS_STEPS)),
+            _QuantizeAngle(hpr[0]), _QuantizeAngle(hpr[1]), _QuantizeAngle(hpr[2]),
+            int(round(scale * SCALE_STEPS)))
+
+def DequantizeTransform(fields: tuple) -> tuple:
+    '''Returns (pos, hpr, scale) from quantized fields.'''
+    pos = Vec3(fields[0] / POS_STEPS, fields[1] / POS_STEPS, fields[2] / POS_STEPS)
+    hpr = Vec3(fields[3] / ANGLE_STEPS, fields[4] / ANGLE_STEPS, fields[5] / ANGLE_STEPS)
+    return pos, hpr, fields[6] / SCALE_STEPS
+
+def _EncodeSpawn(entityID: int, name: str, modelPath: str, texPath: str, fields: tuple) -> bytes:
+    nameBytes = name.encode('utf-8')[:255]
+    modelBytes = modelPath.encode('utf-8')[:255]
+    texBytes = texPath.encode('utf-8')[:255]
+    record = [_ENTITY.pack(entityID, len(nameBytes)), nameBytes, bytes([len(modelBytes)]), modelBytes, bytes([len(texBytes)]), texBytes]
+    record += [_FIELDS[i].pack(fields[i]) for i in range(FIELD_COUNT)]
+    return b''.join(record)
+
+def _EncodeUpdate(entityID: int, fields: tuple, baseFields: tuple) -> bytes:
+    '''Only fields that changed since the baseline are written, flagged in the mask.'''
+    mask = 0
+    record = []
+    for i in range(FIELD_COUNT):
+        if fields[i] != baseFields[i]:
+            mask |= 1 << i
+            record.append(_FIELDS[i].pack(fields[i]))
+    if not mask:
+        return b''
+    return _ENTITY.pack(entityID, mask) + b''.join(record)
+
+def EncodeSnapshot(tick: int, baselineTick: int, baseline: dict, world: dict) -> list:
+    '''Delta-encode world against baseline, returns the datagrams to send.
+       Both states map entity id -> (name, modelPath, texPath, fields).'''
+    spawns, updates, removes = [], [], []
+    for entityID, (name, modelPath, texPath, fields) in world.items():
+        previous = baseline.get(entityID)
+        if previous is None:
+            spawns.append(_EncodeSpawn(entityID, name, modelPath, texPath, fields))
+        else:
+            record = _EncodeUpdate(entityID, fields, previous[3])
+            if record:
+                updates.append(record)
+    for entityID in baseline:
+        if entityID not in world:
+            removes.append(_REMOVE.pack(entityID))
+
+    # Greedily pack records into fragments, each one decodable on its own.
+    fragments = []
+    current = [[], [], []]
+    size = _HEADER.size
+    for kind, records in enumerate((spawns, updates, removes)):
+        for record in records:
+            if size + len(record) > MAX_DATAGRAM and size > _HEADER.size:
+                fragments.append(current)
+                current = [[], [], []]
+                size = _HEADER.size
+            current[kind].append(record)
+            size += len(record)
+    fragments.append(current)
+
+    datagrams = []
+    for index, (spawnList, updateList, removeList) in enumerate(fragments):
+        header = _HEADER.pack(b'S', tick, baselineTick, index, len(fragments), len(spawnList), len(updateList), len(removeList))
+        datagrams.append(header + b''.join(spawnList) + b''.join(updateList) + b''.join(removeList))
+    return datagrams
+
+def DecodeDatagram(data: bytes) -> tuple:
+    '''Returns (tick, baselineTick, index, count, spawns, updates, removes).'''
+    tag, tick, baselineTick, index, count, numSpawns, numUpdates, numRemoves = _HEADER.unpack_from(data, 0)
+    if tag != b'S':
+        raise ValueError("DecodeDatagram() got an unknown datagram tag " + repr(tag))
+    offset = _HEADER.size
+
+    spawns = []
+    for i in range(numSpawns):
+        entityID, nameLength = _ENTITY.unpack_from(data, offset)
+        offset += _ENTITY.size
+        name = data[offset:offset + nameLength].decode('utf-8')
+        offset += nameLength
+        modelLength = data[offset]
+        modelPath = data[offset + 1:offset + 1 + modelLength].decode('utf-8')
+        offset += 1 + modelLength
+        texLength = data[offset]
+        texPath = data[offset + 1:offset + 1 + texLength].decode('utf-8')
+        offset += 1 + texLength
+        fields = []
+        for field in _FIELDS:
+            fields.append(field.unpack_from(data, offset)[0])
+            offset += field.size
+        spawns.append((entityID, name, modelPath, texPath, tuple(fields)))
+
+    updates = []
+    for i in range(numUpdates):
+        entityID, mask = _ENTITY.unpack_from(data, offset)
+        offset += _ENTITY.size
+        changed = {}
+        for bit in range(FIELD_COUNT):
+            if mask & (1 << bit):
+                changed[bit] = _FIELDS[bit].unpack_from(data, offset)[0]
+                offset += _FIELDS[bit].size
+        updates.append((entityID, changed))
+
+    removes = []
+    for i in range(numRemoves):
+        removes.append(_REMOVE.unpack_from(data, offset)[0])
+        offset += _REMOVE.size
+
+    return tick, baselineTick, index, count, spawns, updates, removes
+
+def ApplyDelta(baseline: dict, spawns: list, updates: list, removes: list) -> dict:
+    '''Rebuild a world state from its baseline and decoded records.'''
+    world = dict(baseline)
+    for entityID in removes:
+        world.pop(entityID, None)
+    for entityID, name, modelPath, texPath, fields in spawns:
+        world[entityID] = (name, modelPath, texPath, fields)
+    for entityID, changed in updates:
+        name, modelPath, texPath, fields = world[entityID]
+        fields = tuple(changed.get(i, fields[i]) for i in range(FIELD_COUNT))
+        world[entityID] = (name, modelPath, texPath, fields)
+    return world
+
+
+class SnapshotServer:
+    '''Publishes the authoritative world to thin clients over UDP, one delta snapshot per tick,
+       and drives base.Hero from the controlling client's INPUT datagrams.'''
+    def __init__(self, base: ShowBase, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, tickRate: float = 20, reportInterval: int = 100,
+                 clientTimeout: float = CLIENT_TIMEOUT):
+        self.base = base
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.bind((host, port))
+        self.socket.setblocking(False)
+
+        self.clients = {} # address -> last acked tick, in join order
+        self.lastHeard = {} # address -> time of its last datagram
+        self.clientTimeout = clientTimeout
+        self.history = {} # tick -> world state
+        self.entityIDs = {} # NodePath key -> entity id
+        self.nextID = 1
+        self.tick = 0
+        self.reportInterval = reportInterval
+        self.tickBytes = 0
+        self.inputMask = 0 # Last mask applied from the controlling client
+
+        if tickRate: # 0 leaves publishing to whoever calls Publish()
+            self.base.taskMgr.doMethodLater(1.0 / tickRate, self._Tick, 'snapshotTick')
+        print('Snapshot server listening on ' + host + ':' + str(self.socket.getsockname()[1]))
+
+    def CaptureWorld(self) -> dict:
+        '''Quantize every placed object still attached to render.'''
+        render = self.base.render
+        world = {}
+        entityIDs = {}
+        for nodePath in render.findAllMatches('**/=modelPath'):
+            key = nodePath.getKey()
+            entityID = self.entityIDs.get(key)
+            if entityID is None:
+                entityID = self.nextID
+                self.nextID += 1
+            entityIDs[key] = entityID
+            fields = QuantizeTransform(nodePath.getPos(render), nodePath.getHpr(render), nodePath.getSx(render))
+            world[entityID] = (nodePath.getName(), nodePath.getTag('modelPath'), nodePath.getTag('texPath'), fields)
+        self.entityIDs = entityIDs # Forget nodes that were detached
+        return world
+
+    def _ReceiveDatagrams(self):
+        '''Handle every pending HELLO, ACK, INPUT and BYE datagram.'''
+        while True:
+            try:
+                data, address = self.socket.recvfrom(_ACK.size)
+            except (BlockingIOError, ConnectionResetError):
+                return
+            if len(data) != _ACK.size:
+                continue
+            tag, ackTick = _ACK.unpack(data)
+            if tag == b'H':
+                if address not in self.clients:
+                    print('Snapshot client joined from ' + str(address))
+                self.clients[address] = 0
+            elif address not in self.clients:
+                continue
+            elif tag == b'A':
+                self.clients[address] = max(self.clients[address], ackTick)
+            elif tag == b'I' and address == self.Controller():
+                self.ApplyInput(ackTick)
+            elif tag == b'B':
+                self._DropClient(address)
+                continue
+            self.lastHeard[address] = time.monotonic()
+
+    def Controller(self):
+        '''Address of the client steering the Hero, the earliest one still connected.'''
+        return next(iter(self.clients), None)
+
+    def _DropClient(self, address):
+        wasController = address == self.Controller()
+        del self.clients[address]
+        self.lastHeard.pop(address, None)
+        print('Snapshot client left from ' + str(address))
+        if wasController:
+            self.ApplyInput(0) # Release whatever it was holding, the next client starts from scratch
+
+    def _DropSilentClients(self):
+        deadline = time.monotonic() - self.clientTimeout
+        for address in [address for address, heard in self.lastHeard.items() if heard < deadline]:
+            self._DropClient(address)
+
+    def ApplyInput(self, mask: int):
+        '''Press or release Hero controls whose bits changed, fire on rising fire bits.'''
+        changed = mask ^ self.inputMask
+        self.inputMask = mask
+        for bit, (key, method) in enumerate(HELD_INPUTS):
+            if changed & (1 << bit):
+                getattr(self.base.Hero, method)(1 if mask & (1 << bit) else 0)
+        for bit, (key, method) in enumerate(FIRE_INPUTS, len(HELD_INPUTS)):
+            if changed & mask & (1 << bit):
+                getattr(self.base.Hero, method)()
+
+    def _Tick(self, task):
+        self.Publish(self.CaptureWorld())
+        return task.again
+
+    def Publish(self, world: dict):
+        '''Apply client datagrams, then delta-encode world against each client's acked tick and send.'''
+        self._ReceiveDatagrams()
+        self._DropSilentClients()
+        self.tick += 1
+        self.history[self.tick] = world
+        self.history.pop(self.tick - HISTORY_LENGTH, None)
+
+        self.tickBytes = 0
+        for address, ackTick in self.clients.items():
+            baselineTick = ackTick if ackTick in self.history else 0 # Fall back to a full snapshot
+            baseline = self.history.get(baselineTick, {})
+            for datagram in EncodeSnapshot(self.tick, baselineTick, baseline, world):
+                try:
+                    self.socket.sendto(datagram, address)
+                except OSError: # Dropped like any other lost datagram
+                    continue
+                self.tickBytes += len(datagram)
+
+        if self.reportInterval and self.tick % self.reportInterval == 0:
+            self.Report(world)
+
+    def Report(self, world: dict):
+        '''Log bandwidth for this tick against the number of live drones.'''
+        drones = sum(1 for name, modelPath, texPath, fields in world.values() if name.startswith('Drone'))
+        print(f"Tick {self.tick}: {drones} drones, {len(world)} entities, {len(self.clients)} clients, {self.tickBytes} bytes/tick")
+
+
+class SnapshotClient:
+    '''Receives snapshots, rebuilds the world against its own history and acks each applied tick.'''
+    def __init__(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT):
+        self.server = (host, port)
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1 << 22) # Room for a full snapshot burst
+        self.socket.setblocking(False)
+
+        self.world = {}
+        self.tick = 0
+        self.history = {} # tick -> world state, kept as baselines for the server's deltas
+        self.fragments = {} # tick -> {fragment index: decoded fragment}
+        self.bytesReceived = 0
+        self.socket.sendto(_ACK.pack(b'H', 0), self.server)
+
+    def SendInput(self, mask: int):
+        '''Send the current control bitmask, see HELD_INPUTS and FIRE_INPUTS.'''
+        self.socket.sendto(_ACK.pack(b'I', mask), self.server)
+
+    def Close(self):
+        '''Tell the server to stop sending, then close the socket.'''
+        self.socket.sendto(_ACK.pack(b'B', 0), self.server)
+        self.socket.close()
+
+    def Poll(self) -> bool:
+        '''Drain pending datagrams, returns True if a newer snapshot was applied.'''
+        applied = False
+        received = False
+        while True:
+            try:
+                data = self.socket.recv(65536)
+            except (BlockingIOError, ConnectionResetError):
+                break
+            received = True
+            self.bytesReceived += len(data)
+            fragment = DecodeDatagram(data)
+            tick, count = fragment[0], fragment[3]
+            if tick <= self.tick:
+                continue
+            parts = self.fragments.setdefault(tick, {})
+            parts[fragment[2]] = fragment
+            if len(parts) == count and self._Apply(tick, parts):
+                applied = True
+
+        if not received and not self.tick:
+            self.socket.sendto(_ACK.pack(b'H', 0), self.server) # Server may not have been up yet
+        return applied
+
+    def _Apply(self, tick: int, parts: dict) -> bool:
+        baselineTick = parts[0][1]
+        if baselineTick and baselineTick not in self.history:
+            return False # Baseline already pruned, wait for the server to move on
+        world = self.history.get(baselineTick, {})
+        for index in range(len(parts)):
+            world = ApplyDelta(world, *parts[index][4:])
+
+        self.world = world
+        self.tick = tick
+        self.history[tick] = world
+        for oldTick in [t for t in self.history if t <= tick - HISTORY_LENGTH]:
+            del self.history[oldTick]
+        for oldTick in [t for t in self.fragments if t <= tick]:
+            del self.fragments[oldTick]
+
+        self.socket.sendto(_ACK.pack(b'A', tick), self.server)
+        return True
+
+
+class ViewerApp(ShowBase):
+    '''Thin rendering client, draws whatever the snapshot server sends.'''
+    def __init__(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT):
+        ShowBase.__init__(self)
+        self.disableMouse()
+        self.client = SnapshotClient(host, port)
+        self.entityNodes = {} # entity id -> NodePath
+        self.inputMask = 0
+
+        self.taskMgr.add(self.SyncWorld, 'syncWorld')
+        self.SetKeyBindings()
+        self.accept('escape', self.quit)
+
+    def SetKeyBindings(self):
+        '''Same keys as the local game, forwarded to the server's Hero.'''
+        for bit, (key, method) in enumerate(HELD_INPUTS):
+            self.accept(key, self.SetInput, [bit, True])
+            self.accept(key + '-up', self.SetInput, [bit, False])
+        for bit, (key, method) in enumerate(FIRE_INPUTS, len(HELD_INPUTS)):
+            self.accept(key, self.TriggerInput, [bit])
+
+    def SetInput(self, bit: int, keyDown: bool):
+        if keyDown:
+            self.inputMask |= 1 << bit
+        else:
+            self.inputMask &= ~(1 << bit)
+        self.client.SendInput(self.inputMask)
+
+    def TriggerInput(self, bit: int):
+        '''Fire commands are a press immediately followed by a release.'''
+        self.client.SendInput(self.inputMask | (1 << bit))
+        self.client.SendInput(self.inputMask)
+
+    def SyncWorld(self, task):
+        '''Mirror the latest snapshot into the scene graph.'''
+        if not self.client.Poll():
+            return task.cont
+
+        for entityID in list(self.entityNodes):
+            if entityID not in self.client.world:
+                self.entityNodes.pop(entityID).removeNode()
+
+        for entityID, (name, modelPath, texPath, fields) in self.client.world.items():
+            nodePath: NodePath = self.entityNodes.get(entityID)
+            if nodePath is None:
+                nodePath = self.loader.loadModel(modelPath)
+                nodePath.reparentTo(self.render)
+                nodePath.setName(name)
+                if texPath:
+                    nodePath.setTexture(self.loader.loadTexture(texPath), 1)
+                self.entityNodes[entityID] = nodePath
+                if name == 'Hero':
+                    self.camera.reparentTo(nodePath)
+                    self.camera.setFluidPos(0, -50, 6) # Same chase view as the local game
+
+            pos, hpr, scale = DequantizeTransform(fields)
+            nodePath.setPos(pos)
+            nodePath.setHpr(hpr)
+            nodePath.setScale(scale)
+        return task.cont
+
+    def quit(self):
+        '''Exit viewer.'''
+        self.client.Close()
+        sys.exit()
@@ -0,0 +1,139 @@
+from direct.showbase.ShowBase import ShowBase
+from panda3d.core import Vec3
+import DefensePaths as defensePaths
+import SpaceJamClasses as spaceJamClasses
+import Lifecycle as lifecycle
+import json, math, random
+
+def LoadScenario(scenarioPath: str) -> dict:
+    '''Reads a scenario description, see Assets/Scenarios/SolarSystem.json.'''
+    with open(scenarioPath) as scenarioFile:
+        return json.load(scenarioFile)
+
+def _PatternVector(pattern: str, step: int, cycles: int) -> Vec3:
+    '''Unit vector for one drone of a DefensePaths pattern.'''
+    if pattern == "Cloud":
+        unitVec = defensePaths.Cloud()
+    elif pattern == "BaseballSeams":
+        unitVec = defensePaths.BaseballSeams(step, cycles, B = 0.4)
+    elif pattern == "CircleX":
+        unitVec = defensePaths.CircleX(step)
+    elif pattern == "CircleY":
+        unitVec = defensePaths.CircleY(step)
+    elif pattern == "CircleZ":
+        unitVec = defensePaths.CircleZ(step)
+    else:
+        raise ValueError("Scenario formation has an unknown pattern: " + pattern)
+    unitVec.normalize()
+    return unitVec
+
+
+class Formation:
+    '''Drone pattern around a planet. Slots are fixed up front, so despawning keeps positions and destroyed drones.'''
+    def __init__(self, spec: dict, center: Vec3, cycles: int):
+        self.slots = [] # (drone name, position)
+        for step in range(cycles):
+            spaceJamClasses.Drone.droneCount += 1
+            nickName = "Drone" + str(spaceJamClasses.Drone.droneCount) + spec['suffix']
+            self.slots.append((nickName, _PatternVector(spec['pattern'], step, cycles) * spec['radius'] + center))
+        self.destroyed = set() # Names of drones shot down, never spawned again
+        self.drones = [] # (name, Drone) while loaded
+
+    def Spawn(self, streamer: 'WorldStreamer'):
+        for name, position in self.slots:
+            if name not in self.destroyed:
+                self.drones.append((name, streamer.TakeDrone(name, position)))
+
+    def Despawn(self, streamer: 'WorldStreamer'):
+        for name, drone in self.drones:
+            if not drone.modelNode.hasParent(): # Detached by Spaceship.DroneDestroy
+                self.destroyed.add(name)
+            streamer.ReleaseDrone(drone)
+        self.drones = []
+
+
+class OrbiterSlot:
+    '''An orbiter, built whenever its sector loads and released when it unloads, so only nearby orbiters are in memory.'''
+    def __init__(self, spec: dict, center: Vec3):
+        self.spec = spec
+        self.center = center
+        self.radius = random.randint(*spec['radius']) # Picked once, a rebuilt orbiter keeps its orbit
+        self.orbiter = None
+        self.destroyed = False
+
+    def Spawn(self, streamer: 'WorldStreamer'):
+        if self.destroyed:
+            return
+        orbiterSpec = streamer.scenario['orbiter']
+        self.orbiter = spaceJamClasses.Orbiter(streamer.base.loader, streamer.base.taskMgr, orbiterSpec['model'], streamer.base.render, self.spec['name'],
+                                               orbiterSpec['scale'], orbiterSpec['texture'], self.center, self.radius, self.spec['type'], streamer.base.Hero)
+
+    def Despawn(self, streamer: 'WorldStreamer'):
+        if self.orbiter is None:
+            return
+        if not self.orbiter.modelNode.hasParent(): # Shot down, it won't come back
+            self.destroyed = True
+        self.orbiter.Despawn()
+        lifecycle.Release(self.orbiter)
+        self.orbiter = None
+
+
+class WorldStreamer:
+    '''Spawns formations and orbiters of the sectors around the hero, despawns them into a pool as it leaves.'''
+    def __init__(self, base: ShowBase, scenario: dict, planetRoles: dict, droneCycles: int = None, streamAll: bool = False):
+        self.base = base
+        self.streamAll = streamAll # Keep every sector loaded wherever the hero is, for whole-world bandwidth runs
+        self.scenario = scenario
+        self.sectorSize = scenario['sectorSize']
+        self.loadRadius = scenario['loadRadius']
+        self.unloadRadius = self.loadRadius + 1 # Hysteresis so sector edges don't thrash
+        self.dronePool = [] # Detached Drone objects ready for reuse
+
+        cycles = scenario['formationCycles'] if droneCycles is None else droneCycles
+        self.sectors = {} # sector key -> list of Formation / OrbiterSlot
+        for spec in scenario['formations']:
+            center = planetRoles[spec['planet']].modelNode.getPos()
+            self.sectors.setdefault(self.SectorOf(center), []).append(Formation(spec, center, cycles))
+        for spec in scenario['orbiters']:
+            center = planetRoles[spec['planet']].modelNode.getPos()
+            self.sectors.setdefault(self.SectorOf(center), []).append(OrbiterSlot(spec, center))
+
+        self.loaded = set()
+        self.Update()
+        self.base.taskMgr.doMethodLater(0.5, self.Update, 'worldStreaming')
+
+    def SectorOf(self, position: Vec3) -> tuple:
+        return tuple(int(math.floor(position[i] / self.sectorSize)) for i in range(3))
+
+    def _Distance(self, sectorA: tuple, sectorB: tuple) -> int:
+        '''Sectors apart along the furthest axis.'''
+        return max(abs(sectorA[i] - sectorB[i]) for i in range(3))
+
+    def Update(self, task = None):
+        '''Load sectors within loadRadius of the hero, unload those past unloadRadius. With streamAll every sector stays loaded.'''
+        heroSector = self.SectorOf(self.base.Hero.modelNode.getPos())
+        for sector in list(self.loaded):
+            if not self.streamAll and self._Distance(sector, heroSector) > self.unloadRadius:
+                for content in self.sectors[sector]:
+                    content.Despawn(self)
+                self.loaded.discard(sector)
+        for sector, contents in self.sectors.items():
+            if sector not in self.loaded and (self.streamAll or self._Distance(sector, heroSector) <= self.loadRadius):
+                for content in contents:
+                    content.Spawn(self)
+                self.loaded.add(sector)
+        if task:
+            return task.again
+
+    def TakeDrone(self, name: str, position: Vec3) -> spaceJamClasses.Drone:
+        '''Reuse a pooled drone, or load a new one if the pool is empty.'''
+        if self.dronePool:
+            drone = self.dronePool.pop()
+            drone.Reuse(self.base.render, name, position)
+            return drone
+        droneSpec = self.scenario['drone']
+        return spaceJamClasses.Drone(self.base.loader, droneSpec['model'], self.base.render, name, droneSpec['texture'], position, droneSpec['scale'])
+
+    def ReleaseDrone(self, drone: spaceJamClasses.Drone):
+        drone.modelNode.detachNode()
+        self.dronePool.append(drone)
@@ -0,0 +1,106 @@
+from panda3d.core import NodePath, Texture, Vec3, CollisionTraverser, CollisionHandlerQueue, loadPrcFileData
+from direct.showbase.ShowBase import ShowBase
+import unittest
+import Lifecycle as lifecycle
+import SpaceJamClasses as spaceJamClasses
+
+class _Loader:
+    '''Stands in for ShowBase's loader, models are empty nodes named after their path.'''
+    def loadModel(self, modelPath: str) -> NodePath:
+        return NodePath(modelPath)
+
+    def loadTexture(self, texPath: str) -> Texture:
+        return Texture(texPath)
+
+
+class LifecycleTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        loadPrcFileData('', 'window-type none\naudio-library-name null')
+        cls.base = ShowBase() # Tasks and intervals only free their callbacks once the task manager steps
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.base.destroy()
+
+    def setUp(self):
+        self.loader = _Loader()
+        self.render = self.base.render.attachNewNode('scene')
+        self.traverser = CollisionTraverser()
+        self.handler = CollisionHandlerQueue()
+        self.hero = spaceJamClasses.Planet(self.loader, 'hero', self.render, 'Hero', 'hero.png', Vec3(0, 0, 0), 1)
+
+    def tearDown(self):
+        self.render.removeNode()
+
+    def _Frames(self, count: int = 3):
+        for frame in range(count):
+            self.base.taskMgr.step()
+
+    def assertNoLeaks(self):
+        self.assertEqual(lifecycle.LeakCheck(), {'wrappers': {}, 'nodes': {}, 'attached': {}, 'colliders': {}, 'intervals': {}})
+
+    def _Fire(self, tag: str) -> spaceJamClasses.Missile:
+        '''A missile in flight, tracked like Spaceship.Fire does.'''
+        missile = spaceJamClasses.Missile(self.loader, 'phaser', self.render, tag, 'phaser.png', Vec3(0, 0, 0), 2.0)
+        missile.interval = missile.modelNode.posInterval(2.0, Vec3(0, 100, 0), fluid = 1)
+        lifecycle.TrackInterval(missile.interval, missile)
+        missile.interval.start()
+        self.traverser.addCollider(missile.collisionNode, self.handler)
+        lifecycle.TrackCollider(missile, self.traverser)
+        return missile
+
+    def test_clean_session_reports_no_leaks(self):
+        # Residents owned only by the lifecycle, the way MyApp.SetupScene holds them
+        planet = spaceJamClasses.Planet(self.loader, 'planet', self.render, 'Planet1', 'planet.png', Vec3(0, 5000, 0), 200)
+        lifecycle.Hold(planet)
+        station = spaceJamClasses.SpaceStation(self.loader, 'station', self.render, 'Space Station', 'metal.png', Vec3(-7500, 500, 100), 0.3)
+        lifecycle.Hold(station)
+        wanderer = spaceJamClasses.Wanderer(self.loader, 'drone', self.render, 'Drone-W1', 6.0, 'drone.png', self.hero)
+        lifecycle.Hold(wanderer)
+        orbiter = spaceJamClasses.Orbiter(self.loader, self.base.taskMgr, 'drone', self.render, 'Drone-MLBOrb1', 6.0, 'drone.png',
+                                          planet.modelNode.getPos(), 800, 'MLB', self.hero)
+        self._Fire('Missile1')
+        planet = station = wanderer = None
+        self._Frames()
+
+        # Shoot everything down the way Spaceship does
+        spaceJamClasses.Missile.missiles['Missile1'].interval.finish()
+        lifecycle.Release(spaceJamClasses.Missile.missiles.pop('Missile1'))
+        lifecycle.Release(lifecycle.EntityOf(self.render.find('Planet1')))
+        lifecycle.Release(lifecycle.EntityOf(self.render.find('Space Station')))
+        lifecycle.EntityOf(self.render.find('Drone-W1')).Despawn()
+        orbiter.Despawn()
+        lifecycle.Release(orbiter)
+        orbiter = None
+
+        self._Frames()
+        self.assertNoLeaks()
+
+    def test_held_until_released(self):
+        lifecycle.Hold(spaceJamClasses.Planet(self.loader, 'planet', self.render, 'Planet2', 'planet.png', Vec3(0, 0, 0), 200))
+        planet = lifecycle.EntityOf(self.render.find('Planet2'))
+        lifecycle.LeakCheck()
+        self.assertIsNotNone(planet) # Nothing else owns it, the hold keeps it alive
+
+        lifecycle.Release(planet)
+        self.assertEqual(lifecycle.LeakCheck()['wrappers'], {'Planet': 1}) # Still referenced here
+        planet = None
+        self.assertNoLeaks()
+
+    def test_collider_left_in_traverser_is_reported(self):
+        missile = self._Fire('Missile2')
+        missile.interval.finish()
+        lifecycle.Release(spaceJamClasses.Missile.missiles.pop('Missile2'))
+        self.traverser.addCollider(missile.collisionNode, self.handler) # Re-added after release
+        missile = None
+
+        leaks = lifecycle.LeakCheck()
+        self.assertEqual(leaks['colliders'], {'Missile': 1})
+        self.assertEqual(leaks['nodes'], {'Missile': 1}) # The traverser keeps it alive
+
+        self.traverser.removeCollider(self.traverser.getCollider(0))
+        self.assertNoLeaks()
+
+if __name__ == '__main__':
+    unittest.main()
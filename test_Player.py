@@ -0,0 +1,70 @@
+from panda3d.core import NodePath, PandaNode, CollisionTraverser, CollisionHandlerQueue, CollisionNode, CollisionSphere
+import unittest
+import Player as player
+
+class _Entry:
+    '''Just the parts of a CollisionEntry that FirstImpacts reads.'''
+    def __init__(self, fromName: str, intoName: str, t: float):
+        self.fromNodePath = NodePath(fromName)
+        self.intoNodePath = NodePath(intoName)
+        self.t = t
+
+    def getFromNodePath(self) -> NodePath:
+        return self.fromNodePath
+
+    def getIntoNodePath(self) -> NodePath:
+        return self.intoNodePath
+
+    def getT(self) -> float:
+        return self.t
+
+
+def _Impacts(entries: list, liveMissiles = ('Missile1', 'Missile2')) -> list:
+    return [(shooter, victim, entry.getT()) for shooter, victim, entry in player.FirstImpacts(entries, set(liveMissiles))]
+
+
+class FirstImpactsTest(unittest.TestCase):
+    def test_missile_stops_at_nearest_victim(self):
+        entries = [_Entry('Missile1_cNode', 'Drone3-Cloud_cNode', 0.7),
+                   _Entry('Missile1_cNode', 'Drone1-Cloud_cNode', 0.2),
+                   _Entry('Missile1_cNode', 'Drone2-Cloud_cNode', 0.4)]
+        self.assertEqual(_Impacts(entries), [('Missile1', 'Drone1-Cloud', 0.2)])
+
+    def test_earliest_contact_per_pair(self):
+        entries = [_Entry('Missile1_cNode', 'Planet2_cNode', 0.9), _Entry('Missile1_cNode', 'Planet2_cNode', 0.3)]
+        self.assertEqual(_Impacts(entries), [('Missile1', 'Planet2', 0.3)])
+
+    def test_resolved_in_time_of_impact_order(self):
+        entries = [_Entry('Missile2_cNode', 'Drone5-X_cNode', 0.6), _Entry('Missile1_cNode', 'Drone5-X_cNode', 0.1)]
+        self.assertEqual(_Impacts(entries), [('Missile1', 'Drone5-X', 0.1), ('Missile2', 'Drone5-X', 0.6)])
+
+    def test_released_missiles_are_skipped(self):
+        entries = [_Entry('Missile1_cNode', 'Drone1-Cloud_cNode', 0.1), _Entry('Missile2_cNode', 'Drone2-Cloud_cNode', 0.5)]
+        self.assertEqual(_Impacts(entries, ['Missile2']), [('Missile2', 'Drone2-Cloud', 0.5)])
+
+    def test_swept_traversal_orders_stacked_drones(self):
+        # A missile passing through three drones in one frame, with prev transforms respected like MyApp.cTrav
+        render = NodePath('render')
+        for i, y in enumerate([300, 100, 200]):
+            drone = render.attachNewNode(CollisionNode(f'Drone{i + 1}-Cloud_cNode'))
+            drone.node().addSolid(CollisionSphere(0, y, 0, 30))
+        missile = render.attachNewNode(CollisionNode('Missile1_cNode'))
+        missile.node().addSolid(CollisionSphere(0, 0, 0, 2))
+        PandaNode.resetAllPrevTransform()
+        missile.setFluidPos(0, 400, 0)
+
+        traverser = CollisionTraverser()
+        traverser.setRespectPrevTransform(True)
+        queue = CollisionHandlerQueue()
+        traverser.addCollider(missile, queue)
+        traverser.traverse(render)
+        entries = [queue.getEntry(i) for i in range(queue.getNumEntries())]
+
+        self.assertEqual(len(entries), 3)
+        impacts = player.FirstImpacts(entries, {'Missile1'})
+        self.assertEqual([(shooter, victim) for shooter, victim, entry in impacts], [('Missile1', 'Drone2-Cloud')]) # Nearest, at y=100
+        self.assertGreater(impacts[0][2].getT(), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+from panda3d.core import CollisionTraverser, CollisionHandlerQueue, CollisionNode, CollisionSphere, loadPrcFileData
+from direct.showbase.ShowBase import ShowBase
+import os, tempfile, unittest
+import QualityGovernor as qualityGovernor
+
+class _Hero:
+    def __init__(self, render):
+        self.modelNode = render.attachNewNode('Hero')
+
+    def SetParticleBudget(self, budget: float):
+        self.particleBudget = budget
+
+
+class QualityGovernorTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        loadPrcFileData('', 'window-type none\naudio-library-name null')
+        cls.base = ShowBase()
+        cls.base.cTrav = CollisionTraverser()
+        cls.base.Hero = _Hero(cls.base.render)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.base.destroy()
+
+    def setUp(self):
+        self.governor = qualityGovernor.QualityGovernor(self.base)
+
+    def tearDown(self):
+        for taskName in ['qualityGovernor', 'governedTraverse', 'droneDetail']:
+            self.base.taskMgr.remove(taskName)
+        self.governor.Close()
+
+    def _Collider(self, name: str, radius: float):
+        collider = self.base.render.attachNewNode(CollisionNode(name))
+        collider.node().addSolid(CollisionSphere(0, 0, 0, radius))
+        return collider
+
+    def _CrossDrone(self, traverseInterval: int, delay: int) -> int:
+        '''Fly a missile through a 60 unit drone at 100 units a frame, returns how many contacts were reported.'''
+        self.governor.traverseInterval = traverseInterval
+        drone = self._Collider('Drone1_cNode', 30)
+        missile = self._Collider('Missile1_cNode', 2)
+        missile.setPos(0, -550, 0)
+        queue = CollisionHandlerQueue()
+        self.base.cTrav.addCollider(missile, queue)
+        for frame in range(2 + delay): # Settle, delay shifts which frames get traversed
+            self.base.taskMgr.step()
+
+        contacts = 0
+        for y in range(-450, 451, 100): # Never overlaps the drone at rest, only while crossing -50 -> 50
+            missile.setFluidPos(0, y, 0)
+            self.base.taskMgr.step()
+            contacts += queue.getNumEntries()
+            queue.clearEntries()
+
+        self.base.cTrav.removeCollider(missile)
+        missile.removeNode()
+        drone.removeNode()
+        return contacts
+
+    def test_missile_hits_every_frame_traversal(self):
+        self.assertEqual(self._CrossDrone(1, 0), 1)
+
+    def test_missile_hits_when_crossing_on_skipped_frame(self):
+        # One of the two delays puts the crossing on a frame without traversal
+        self.assertEqual(self._CrossDrone(2, 0), 1)
+        self.assertEqual(self._CrossDrone(2, 1), 1)
+
+    def test_log_is_opt_in(self):
+        self.assertIsNone(self.governor.logFile)
+
+        logPath = os.path.join(tempfile.mkdtemp(), 'quality_log.csv')
+        for run in range(2):
+            governor = qualityGovernor.QualityGovernor(self.base, logPath = logPath)
+            governor.frameTimes.append(0.02)
+            governor.SetLevel(1, 0.02)
+            governor.Close()
+        with open(logPath) as logFile:
+            lines = logFile.read().splitlines()
+        self.assertEqual(lines[0], 'time,frame,fromLevel,toLevel,avgFrameMs,maxFrameMs')
+        self.assertEqual(len(lines), 3) # One header, one change per run
+        self.governor.SetLevel(0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,176 @@
+from panda3d.core import NodePath
+import time, unittest
+import SpaceJamNet as spaceJamNet
+
+def _World(count: int) -> dict:
+    '''count drones with distinct quantized transforms.'''
+    world = {}
+    for i in range(1, count + 1):
+        fields = spaceJamNet.QuantizeTransform((i * 10.5, -i * 3.25, 7.0), (i * 1.5, 0, -45), 5)
+        world[i] = ("Drone" + str(i) + "-Cloud", "./Assets/DroneDefender/DroneDefender.obj", "./Assets/DroneDefender/octotoad1_auv.png", fields)
+    return world
+
+def _Decode(datagrams: list, baseline: dict) -> dict:
+    world = baseline
+    for datagram in datagrams:
+        world = spaceJamNet.ApplyDelta(world, *spaceJamNet.DecodeDatagram(datagram)[4:])
+    return world
+
+
+class CodecTest(unittest.TestCase):
+    def test_quantize_round_trip(self):
+        fields = spaceJamNet.QuantizeTransform((1000.03, -50, 12000), (370, -90, 180), 0.5)
+        pos, hpr, scale = spaceJamNet.DequantizeTransform(fields)
+        self.assertAlmostEqual(pos[0], 1000.03, delta = 1.0 / spaceJamNet.POS_STEPS)
+        self.assertAlmostEqual(pos[2], 12000)
+        self.assertAlmostEqual(hpr[0], 10, delta = 0.01) # Wrapped
+        self.assertAlmostEqual(hpr[1], -90, delta = 0.01)
+        self.assertEqual(scale, 0.5)
+
+    def test_full_snapshot(self):
+        world = _World(300)
+        self.assertEqual(_Decode(spaceJamNet.EncodeSnapshot(1, 0, {}, world), {}), world)
+
+    def test_delta_spawn_update_remove(self):
+        baseline = _World(300)
+        world = dict(baseline)
+        del world[7]
+        name, modelPath, texPath, fields = world[3]
+        world[3] = (name, modelPath, texPath, (fields[0] + 16,) + fields[1:])
+        world[301] = ("Missile1", "./Assets/Phaser/phaser.egg", "", spaceJamNet.QuantizeTransform((0, 0, 0), (0, 0, 0), 2.0))
+
+        datagrams = spaceJamNet.EncodeSnapshot(2, 1, baseline, world)
+        self.assertEqual(len(datagrams), 1)
+        tick, baselineTick, index, count, spawns, updates, removes = spaceJamNet.DecodeDatagram(datagrams[0])
+        self.assertEqual([spawn[0] for spawn in spawns], [301])
+        self.assertEqual(updates, [(3, {0: fields[0] + 16})]) # Only the changed field
+        self.assertEqual(removes, [7])
+        self.assertEqual(_Decode(datagrams, baseline), world)
+
+    def test_fragmentation(self):
+        world = _World(30000) # Needs more than 255 fragments
+        datagrams = spaceJamNet.EncodeSnapshot(1, 0, {}, world)
+        self.assertGreater(len(datagrams), 255)
+        self.assertTrue(all(len(datagram) <= spaceJamNet.MAX_DATAGRAM for datagram in datagrams))
+        self.assertEqual(_Decode(datagrams, {}), world)
+
+
+class _Hero:
+    '''Records the Spaceship calls the server makes.'''
+    def __init__(self):
+        self.calls = []
+
+    def __getattr__(self, method):
+        return lambda *args: self.calls.append((method,) + args)
+
+
+class LoopbackTest(unittest.TestCase):
+    def setUp(self):
+        self.base = type('Base', (), {})()
+        self.base.Hero = _Hero()
+        self.server = spaceJamNet.SnapshotServer(self.base, port = 0, tickRate = 0, reportInterval = 0)
+        self.client = spaceJamNet.SnapshotClient(port = self.server.socket.getsockname()[1])
+
+    def tearDown(self):
+        self.server.socket.close()
+        self.client.socket.close()
+
+    def _Exchange(self, world: dict):
+        '''Publish one tick and wait for the client to apply it.'''
+        self.server.Publish(world)
+        deadline = time.time() + 2
+        while not self.client.Poll():
+            self.assertLess(time.time(), deadline, "client never applied tick " + str(self.server.tick))
+            time.sleep(0.005)
+        time.sleep(0.01) # Let the ACK land before the next Publish
+
+    def test_full_then_delta(self):
+        world = _World(2000) # Fragmented
+        self._Exchange(world)
+        self.assertEqual(self.client.world, world)
+
+        fullBytes = self.server.tickBytes
+        moved = dict(world)
+        del moved[1]
+        name, modelPath, texPath, fields = moved[2]
+        moved[2] = (name, modelPath, texPath, (fields[0] + 1,) + fields[1:])
+        self._Exchange(moved)
+        self.assertEqual(self.client.world, moved)
+        self.assertEqual(list(self.server.clients.values()), [1]) # Delta was against the ack
+        self.assertLess(self.server.tickBytes, fullBytes / 100)
+
+    def test_pruned_baseline_falls_back_to_full(self):
+        world = _World(50)
+        self._Exchange(world)
+        self.server.history.clear() # Acked tick no longer available
+        self._Exchange(world)
+        self.assertEqual(self.client.world, world)
+        self.assertGreater(self.server.tickBytes, 50 * 40) # Spawn records again
+
+    def test_capture_world_reads_tags(self):
+        self.base.render = NodePath('render')
+        drone = self.base.render.attachNewNode('Drone1-Cloud')
+        drone.setTag('modelPath', './Assets/DroneDefender/DroneDefender.obj')
+        drone.setTag('texPath', './Assets/DroneDefender/octotoad1_auv.png')
+        drone.setPos(100, 0, 0)
+        self.base.render.attachNewNode('ExplosionEffects') # Untagged, not replicated
+
+        world = self.server.CaptureWorld()
+        self.assertEqual(list(world.values()), [('Drone1-Cloud', './Assets/DroneDefender/DroneDefender.obj', './Assets/DroneDefender/octotoad1_auv.png',
+                                                 spaceJamNet.QuantizeTransform((100, 0, 0), (0, 0, 0), 1.0))])
+        self.assertEqual(self.server.CaptureWorld().keys(), world.keys()) # Stable ids
+        drone.detachNode()
+        self.assertEqual(self.server.CaptureWorld(), {})
+
+    def test_input_drives_hero(self):
+        self._Exchange({})
+        self.client.SendInput(1) # space down
+        self.client.SendInput(1 | 1 << len(spaceJamNet.HELD_INPUTS)) # fire
+        self.client.SendInput(1)
+        self.client.SendInput(0) # space up
+        time.sleep(0.05)
+        self.server.Publish({})
+        self.assertEqual(self.base.Hero.calls, [('fwdThrust', 1), ('Fire',), ('fwdThrust', 0)])
+
+    def test_bye_drops_client(self):
+        self._Exchange(_World(50))
+        self.client.Close()
+        time.sleep(0.05)
+        self.server.Publish(_World(50))
+        self.assertEqual(self.server.clients, {})
+        self.assertEqual(self.server.tickBytes, 0) # No full snapshots to a departed client
+
+    def test_silent_client_times_out(self):
+        self._Exchange(_World(50))
+        self.server.clientTimeout = 0.05
+        self.server.Publish(_World(50)) # Takes the last ack, the client never polls again, like a crashed viewer
+        time.sleep(0.1)
+        self.server.Publish(_World(50))
+        self.assertEqual(self.server.clients, {})
+        self.assertEqual(self.server.tickBytes, 0)
+
+    def test_only_controller_drives_hero(self):
+        self._Exchange({})
+        watcher = spaceJamNet.SnapshotClient(port = self.server.socket.getsockname()[1])
+        time.sleep(0.05)
+        self.server.Publish({})
+        self.assertEqual(len(self.server.clients), 2)
+
+        self.client.SendInput(1 << 1) # Controller holds a
+        watcher.SendInput(1) # Ignored, would otherwise release a and press space
+        time.sleep(0.05)
+        self.server.Publish({})
+        self.assertEqual(self.base.Hero.calls, [('LeftTurn', 1)])
+
+        self.client.Close() # Controller leaves, its keys are released and the watcher takes over
+        time.sleep(0.05)
+        self.server.Publish({})
+        watcher.SendInput(1)
+        time.sleep(0.05)
+        self.server.Publish({})
+        watcher.socket.close()
+        self.assertEqual(self.base.Hero.calls, [('LeftTurn', 1), ('LeftTurn', 0), ('fwdThrust', 1)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,119 @@
+from panda3d.core import NodePath, Texture, Vec3
+from direct.task.TaskManagerGlobal import taskMgr
+import types, unittest
+import Lifecycle as lifecycle
+import WorldStreamer as worldStreamer
+
+class _Loader:
+    '''Stands in for ShowBase's loader, models are empty nodes named after their path.'''
+    def loadModel(self, modelPath: str) -> NodePath:
+        return NodePath(modelPath)
+
+    def loadTexture(self, texPath: str) -> Texture:
+        return Texture(texPath)
+
+# Two planets five sectors apart, a formation around each and an orbiter around the far one.
+SCENARIO = {
+    'sectorSize': 1000,
+    'loadRadius': 1,
+    'drone': {'model': 'drone', 'texture': 'drone.png', 'scale': 5},
+    'formationCycles': 4,
+    'formations': [{'planet': 'Near', 'pattern': 'CircleX', 'suffix': '-X', 'radius': 300},
+                   {'planet': 'Far', 'pattern': 'CircleY', 'suffix': '-Y', 'radius': 300}],
+    'orbiter': {'model': 'drone', 'texture': 'drone.png', 'scale': 6.0},
+    'orbiters': [{'planet': 'Far', 'name': 'Drone-Orb1', 'type': 'MLB', 'radius': [400, 500]}],
+}
+
+
+class WorldStreamerTest(unittest.TestCase):
+    def setUp(self):
+        render = NodePath('render')
+        self.base = types.SimpleNamespace(loader = _Loader(), render = render, taskMgr = taskMgr,
+                                          Hero = types.SimpleNamespace(modelNode = render.attachNewNode('Hero')))
+        planets = {}
+        for role, position in [('Near', (500, 500, 500)), ('Far', (5500, 500, 500))]:
+            planets[role] = types.SimpleNamespace(modelNode = NodePath(role))
+            planets[role].modelNode.setPos(position)
+        self.planets = planets
+
+    def tearDown(self):
+        taskMgr.remove('worldStreaming')
+        for sector in list(self.streamer.loaded):
+            for content in self.streamer.sectors[sector]:
+                content.Despawn(self.streamer)
+
+    def _Streamer(self, **options) -> worldStreamer.WorldStreamer:
+        self.streamer = worldStreamer.WorldStreamer(self.base, SCENARIO, self.planets, **options)
+        return self.streamer
+
+    def _MoveHero(self, x: float):
+        self.base.Hero.modelNode.setPos(x, 500, 500)
+        self.streamer.Update()
+
+    def _Drones(self, suffix: str) -> list:
+        return [drone.getName() for drone in self.base.render.findAllMatches('Drone*' + suffix)]
+
+    def test_sectors_stream_around_hero(self):
+        streamer = self._Streamer()
+        self.assertEqual(len(self._Drones('-X')), 4)
+        self.assertEqual(self._Drones('-Y'), [])
+        self.assertTrue(self.base.render.find('Drone-Orb1').isEmpty())
+
+        self._MoveHero(5500)
+        self.assertEqual(self._Drones('-X'), [])
+        self.assertEqual(len(self._Drones('-Y')), 4)
+        self.assertFalse(self.base.render.find('Drone-Orb1').isEmpty())
+        self.assertEqual(streamer.dronePool, []) # Far drones reused the near formation's drones
+
+        self._MoveHero(0)
+        self.assertEqual(len(self._Drones('-X')), 4)
+        self.assertEqual(streamer.dronePool, []) # Unloaded far drones went back to the near formation
+        self.assertTrue(self.base.render.find('Drone-Orb1').isEmpty())
+
+    def test_unload_hysteresis(self):
+        streamer = self._Streamer()
+        self._MoveHero(2500) # Two sectors out, past loadRadius but not unloadRadius
+        self.assertEqual(len(self._Drones('-X')), 4)
+        self._MoveHero(3500)
+        self.assertEqual(self._Drones('-X'), [])
+        self.assertEqual(len(streamer.dronePool), 4)
+
+    def test_destroyed_drones_stay_destroyed(self):
+        self._Streamer()
+        shot = self._Drones('-X')[0]
+        self.base.render.find(shot).detachNode() # What Spaceship.DroneDestroy does to a streamed drone
+        self._MoveHero(5500)
+        self._MoveHero(0)
+        drones = self._Drones('-X')
+        self.assertEqual(len(drones), 3)
+        self.assertNotIn(shot, drones)
+
+    def test_orbiters_released_on_unload_and_rebuilt(self):
+        streamer = self._Streamer()
+        self._MoveHero(5500)
+        slot = streamer.sectors[streamer.SectorOf(Vec3(5500, 500, 500))][-1]
+        first = slot.orbiter
+        released = lifecycle.released.get('Orbiter', 0)
+
+        self._MoveHero(0)
+        self.assertIsNone(slot.orbiter)
+        self.assertEqual(lifecycle.released['Orbiter'], released + 1)
+        self._MoveHero(5500)
+        self.assertIsNot(slot.orbiter, first)
+        self.assertEqual(slot.orbiter.orbitRadius, first.orbitRadius)
+
+        slot.orbiter.Despawn() # Shot down
+        self._MoveHero(0)
+        self._MoveHero(5500)
+        self.assertIsNone(slot.orbiter)
+        self.assertTrue(self.base.render.find('Drone-Orb1').isEmpty())
+
+    def test_stream_all_and_zero_cycles(self):
+        self._Streamer(streamAll = True, droneCycles = 0)
+        self.assertEqual(len(self.streamer.loaded), 2)
+        self.assertEqual(self._Drones('-X') + self._Drones('-Y'), [])
+        self.assertFalse(self.base.render.find('Drone-Orb1').isEmpty())
+
+
+if __name__ == '__main__':
+    unittest.main()